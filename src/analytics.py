@@ -0,0 +1,228 @@
+import json
+import os
+import time
+from collections import deque
+from statistics import median
+from typing import Deque, Dict, List, Optional, Tuple
+
+STATS_FILE = 'voice_stats.json'
+
+# Every buffer below is bounded so memory stays constant however long the bot runs
+EVENT_BUFFER_SIZE = 256  # raw session events kept per guild
+LIFETIME_BUFFER_SIZE = 512  # recent channel lifetimes kept per guild (median sample)
+MINUTE_ROLLUPS = 60  # one hour at minute resolution
+HOUR_ROLLUPS = 24 * 7  # one week at hour resolution
+
+
+class Rollup:
+    """Aggregated temp channel activity over a fixed time bucket"""
+
+    __slots__ = ('start', 'created', 'deleted', 'peak', 'lifetime_total', 'lifetime_count', 'reused', 'throttled')
+
+    def __init__(self, start: int, peak: int = 0):
+        self.start = start
+        self.created = 0
+        self.deleted = 0
+        self.peak = peak  # peak number of concurrent temp channels
+        self.lifetime_total = 0.0
+        self.lifetime_count = 0
+        self.reused = 0  # joins sent back to the member's existing channel
+        self.throttled = 0  # joins refused by the creation rate limits
+
+    def merge(self, other: 'Rollup'):
+        """Fold a finer-grained rollup into this one"""
+        self.created += other.created
+        self.deleted += other.deleted
+        self.peak = max(self.peak, other.peak)
+        self.lifetime_total += other.lifetime_total
+        self.lifetime_count += other.lifetime_count
+        self.reused += other.reused
+        self.throttled += other.throttled
+
+    def to_list(self) -> list:
+        """Compact representation for the stats file"""
+        return [self.start, self.created, self.deleted, self.peak, round(self.lifetime_total, 1), self.lifetime_count,
+                self.reused, self.throttled]
+
+    @classmethod
+    def from_list(cls, data: list) -> 'Rollup':
+        rollup = cls(int(data[0]), int(data[3]))
+        rollup.created = int(data[1])
+        rollup.deleted = int(data[2])
+        rollup.lifetime_total = float(data[4])
+        rollup.lifetime_count = int(data[5])
+        if len(data) > 7:
+            rollup.reused = int(data[6])
+            rollup.throttled = int(data[7])
+        return rollup
+
+
+class GuildVoiceStats:
+    def __init__(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.events: Deque[Tuple[float, str, int]] = deque(maxlen=EVENT_BUFFER_SIZE)  # (timestamp, kind, channel_id)
+        self.lifetimes: Deque[Tuple[float, float]] = deque(maxlen=LIFETIME_BUFFER_SIZE)  # (ended_at, seconds)
+        self.minutes: Deque[Rollup] = deque(maxlen=MINUTE_ROLLUPS)
+        self.hours: Deque[Rollup] = deque(maxlen=HOUR_ROLLUPS)
+        self.open_channels: Dict[int, float] = {}  # channel_id -> created_at
+        self.current_minute = Rollup(_bucket_start(now, 60))
+        self.current_hour = Rollup(_bucket_start(now, 3600))
+
+    def roll(self, now: float) -> bool:
+        """Close finished buckets. Returns True if an hour rollup was closed."""
+        hour_closed = False
+        minute_start = _bucket_start(now, 60)
+        if minute_start > self.current_minute.start:
+            self.minutes.append(self.current_minute)
+            self.current_hour.merge(self.current_minute)
+            self.current_minute = Rollup(minute_start, len(self.open_channels))
+
+        hour_start = _bucket_start(now, 3600)
+        if hour_start > self.current_hour.start:
+            self.hours.append(self.current_hour)
+            self.current_hour = Rollup(hour_start, len(self.open_channels))
+            hour_closed = True
+        return hour_closed
+
+    def record_created(self, channel_id: int, now: float):
+        """Record the creation of a temp channel"""
+        self.roll(now)
+        self.events.append((now, 'create', channel_id))
+        self.open_channels[channel_id] = now
+        self.current_minute.created += 1
+        self.current_minute.peak = max(self.current_minute.peak, len(self.open_channels))
+
+    def record_deleted(self, channel_id: int, now: float):
+        """Record the deletion of a temp channel"""
+        self.roll(now)
+        self.events.append((now, 'delete', channel_id))
+        self.current_minute.deleted += 1
+        created_at = self.open_channels.pop(channel_id, None)
+        if created_at is not None:
+            lifetime = now - created_at
+            self.lifetimes.append((now, lifetime))
+            self.current_minute.lifetime_total += lifetime
+            self.current_minute.lifetime_count += 1
+
+    def record_reused(self, now: float):
+        """Record a join to a creator answered by moving the member back to their channel"""
+        self.roll(now)
+        self.current_minute.reused += 1
+
+    def record_throttled(self, now: float):
+        """Record a join to a creator refused by the creation rate limits"""
+        self.roll(now)
+        self.current_minute.throttled += 1
+
+    def summary(self, now: float) -> Dict:
+        """Aggregate the rollups into the figures shown by /voicestats"""
+        self.roll(now)
+        last_hour = [m for m in self.minutes if m.start >= now - 3600]
+        last_day = [h for h in self.hours if h.start >= now - 86400]
+
+        created_last_day = sum(h.created for h in last_day) + self.current_hour.created + self.current_minute.created
+        tracked_since = min([h.start for h in last_day] + [self.current_hour.start])
+        hours_covered = max(1.0, (now - tracked_since) / 3600)
+
+        recent_lifetimes = [seconds for ended_at, seconds in self.lifetimes if ended_at >= now - 86400]
+
+        return {
+            'live': len(self.open_channels),
+            'peak_hour': max([m.peak for m in last_hour] + [self.current_minute.peak]),
+            'peak_day': max([h.peak for h in last_day] + [self.current_hour.peak, self.current_minute.peak]),
+            'created_hour': sum(m.created for m in last_hour) + self.current_minute.created,
+            'created_per_hour': created_last_day / hours_covered,
+            'reused_hour': sum(m.reused for m in last_hour) + self.current_minute.reused,
+            'throttled_hour': sum(m.throttled for m in last_hour) + self.current_minute.throttled,
+            'median_lifetime': median(recent_lifetimes) if recent_lifetimes else None
+        }
+
+    def to_dict(self) -> dict:
+        """Only the hourly rollups and the lifetime sample are persisted"""
+        return {
+            'hours': [rollup.to_list() for rollup in self.hours],
+            'lifetimes': [[round(ended_at), round(seconds, 1)] for ended_at, seconds in self.lifetimes]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'GuildVoiceStats':
+        stats = cls()
+        stats.hours.extend(Rollup.from_list(rollup) for rollup in data.get('hours', []))
+        stats.lifetimes.extend((float(ended_at), float(seconds)) for ended_at, seconds in data.get('lifetimes', []))
+        return stats
+
+
+class VoiceAnalytics:
+    def __init__(self):
+        self.guilds: Dict[int, GuildVoiceStats] = {}  # guild_id -> stats
+
+    def _get(self, guild_id: int) -> GuildVoiceStats:
+        if guild_id not in self.guilds:
+            self.guilds[guild_id] = GuildVoiceStats()
+        return self.guilds[guild_id]
+
+    def record_created(self, guild_id: int, channel_id: int):
+        """Record that a temp channel was created in a guild"""
+        self._get(guild_id).record_created(channel_id, time.time())
+
+    def record_deleted(self, guild_id: int, channel_id: int):
+        """Record that a temp channel was deleted in a guild"""
+        self._get(guild_id).record_deleted(channel_id, time.time())
+
+    def record_reused(self, guild_id: int):
+        """Record that a member was moved back to the temp channel they already own"""
+        self._get(guild_id).record_reused(time.time())
+
+    def record_throttled(self, guild_id: int):
+        """Record that a temp channel creation was refused by the rate limits"""
+        self._get(guild_id).record_throttled(time.time())
+
+    def roll_all(self) -> bool:
+        """Close finished buckets for every guild. Returns True if an hour rollup was closed."""
+        now = time.time()
+        hour_closed = False
+        for stats in self.guilds.values():
+            hour_closed = stats.roll(now) or hour_closed
+        return hour_closed
+
+    def get_summary(self, guild_id: int) -> Optional[Dict]:
+        """Get the aggregated statistics for a guild, or None if nothing was recorded"""
+        stats = self.guilds.get(guild_id)
+        if stats is None:
+            return None
+        return stats.summary(time.time())
+
+    def get_events(self, guild_id: int) -> List[Tuple[float, str, int]]:
+        """Get the most recent raw session events for a guild"""
+        stats = self.guilds.get(guild_id)
+        return list(stats.events) if stats else []
+
+    def save_stats(self):
+        """Save the compact rollups to file"""
+        data = {
+            str(guild_id): stats.to_dict()
+            for guild_id, stats in self.guilds.items()
+        }
+
+        with open(STATS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+    def load_stats(self):
+        """Load the rollups from file"""
+        if not os.path.exists(STATS_FILE):
+            return
+
+        try:
+            with open(STATS_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            self.guilds = {
+                int(guild_id): GuildVoiceStats.from_dict(stats)
+                for guild_id, stats in data.items()
+            }
+        except Exception as e:
+            print(f"Error loading voice statistics: {e}")
+
+
+def _bucket_start(timestamp: float, size: int) -> int:
+    return int(timestamp // size) * size
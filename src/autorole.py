@@ -0,0 +1,68 @@
+from typing import Callable, Dict, List, Optional
+
+# Rule conditions on the bot flag and on the member's join history
+BOT_FILTERS = ['any', 'exclude', 'only']
+REJOIN_FILTERS = ['any', 'first', 'rejoin']
+
+# (account_age_days, is_bot, rejoining) -> bool
+Predicate = Callable[[float, bool, bool], bool]
+
+
+def make_rule(role_id: int, expiry_minutes: Optional[int] = None, min_account_age_days: Optional[int] = None,
+              bots: str = 'any', rejoin: str = 'any') -> Dict:
+    """Build an autorole rule as stored in the configuration file"""
+    return {
+        'role_id': role_id,
+        'expiry_minutes': expiry_minutes,
+        'min_account_age_days': min_account_age_days,
+        'bots': bots,
+        'rejoin': rejoin
+    }
+
+
+def compile_rule(rule: Dict) -> Predicate:
+    """Compile a rule into a predicate that only checks the conditions it actually sets"""
+    checks: List[Predicate] = []
+
+    min_age = rule.get('min_account_age_days')
+    if min_age:
+        checks.append(lambda age, is_bot, rejoining: age >= min_age)
+
+    bots = rule.get('bots', 'any')
+    if bots == 'exclude':
+        checks.append(lambda age, is_bot, rejoining: not is_bot)
+    elif bots == 'only':
+        checks.append(lambda age, is_bot, rejoining: is_bot)
+
+    rejoin = rule.get('rejoin', 'any')
+    if rejoin == 'first':
+        checks.append(lambda age, is_bot, rejoining: not rejoining)
+    elif rejoin == 'rejoin':
+        checks.append(lambda age, is_bot, rejoining: rejoining)
+
+    if not checks:
+        return lambda age, is_bot, rejoining: True
+    if len(checks) == 1:
+        return checks[0]
+    return lambda age, is_bot, rejoining: all(check(age, is_bot, rejoining) for check in checks)
+
+
+class CompiledRules:
+    """The autorole rules of a guild, compiled once into predicates"""
+
+    def __init__(self, rules: List[Dict]):
+        self.predicates = [(rule['role_id'], compile_rule(rule)) for rule in rules]
+        self.expiries: Dict[int, int] = {
+            rule['role_id']: rule['expiry_minutes']
+            for rule in rules
+            if rule.get('expiry_minutes')
+        }
+        self.tracks_rejoin = any(rule.get('rejoin', 'any') != 'any' for rule in rules)
+
+    def evaluate(self, account_age_days: float, is_bot: bool, rejoining: bool) -> List[int]:
+        """Get the ids of the roles a joining member should receive"""
+        return [
+            role_id
+            for role_id, predicate in self.predicates
+            if predicate(account_age_days, is_bot, rejoining)
+        ]
@@ -0,0 +1,101 @@
+import asyncio
+import functools
+from collections import deque
+from typing import Callable, Deque, Dict
+
+import nextcord
+from nextcord import Interaction
+
+RESPONSE_DEADLINE = 3.0  # seconds Discord waits for the initial response
+FOLLOWUP_WINDOW = 15 * 60  # seconds the interaction token stays valid for followups
+DEFER_BUDGET = 2.0  # seconds after receipt before deferring
+LATENCY_SAMPLES = 200  # latencies kept per command
+
+
+class CommandGuard:
+    """Defers slow slash commands before Discord's interaction deadline and records their latency
+
+    Commands wrapped with guard() reply through reply(), which sends the initial response
+    or, once the interaction has been deferred, a followup.
+    """
+
+    def __init__(self, budget: float = DEFER_BUDGET):
+        self.budget = budget
+        self.latencies: Dict[str, Deque[float]] = {}  # command -> seconds from receipt to completion
+        self.deferred: Dict[str, int] = {}  # command -> number of automatic defers
+        self._locks: Dict[int, asyncio.Lock] = {}  # interaction_id -> lock between the defer and replies
+
+    def guard(self, ephemeral: bool = False) -> Callable:
+        """Decorator for slash command callbacks
+
+        Args:
+            ephemeral: Whether the automatic defer (and thus the followups) should be ephemeral
+        """
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            async def wrapper(interaction: Interaction, *args, **kwargs):
+                name = interaction.application_command.qualified_name
+                lock = self._locks[interaction.id] = asyncio.Lock()
+                delay = max(0.0, self.budget - _age(interaction))
+                timer = asyncio.create_task(self._defer_later(interaction, lock, delay, ephemeral, name))
+                try:
+                    return await func(interaction, *args, **kwargs)
+                finally:
+                    timer.cancel()
+                    self._locks.pop(interaction.id, None)
+                    self._record(name, _age(interaction))
+            return wrapper
+        return decorator
+
+    async def _defer_later(self, interaction: Interaction, lock: asyncio.Lock, delay: float, ephemeral: bool, name: str):
+        await asyncio.sleep(delay)
+        async with lock:
+            if interaction.response.is_done():
+                return
+            self.deferred[name] = self.deferred.get(name, 0) + 1
+            # Shielded so the command finishing meanwhile can't cancel the request halfway
+            await asyncio.shield(interaction.response.defer(ephemeral=ephemeral))
+
+    def can_reply(self, interaction: Interaction) -> bool:
+        """Check whether Discord still accepts a response or a followup for an interaction"""
+        if interaction.response.is_done():
+            return _age(interaction) < FOLLOWUP_WINDOW
+        return _age(interaction) < RESPONSE_DEADLINE
+
+    async def reply(self, interaction: Interaction, *args, **kwargs):
+        """Send the response of a command, as a followup if the interaction was already answered or deferred"""
+        lock = self._locks.get(interaction.id)
+        if lock is None:
+            return await _send(interaction, *args, **kwargs)
+        async with lock:
+            return await _send(interaction, *args, **kwargs)
+
+    def _record(self, name: str, latency: float):
+        if name not in self.latencies:
+            self.latencies[name] = deque(maxlen=LATENCY_SAMPLES)
+        self.latencies[name].append(latency)
+
+    def get_latency_stats(self) -> Dict[str, Dict]:
+        """Get the latency distribution of each command, in seconds"""
+        stats = {}
+        for name, samples in self.latencies.items():
+            ordered = sorted(samples)
+            stats[name] = {
+                'count': len(ordered),
+                'p50': ordered[len(ordered) // 2],
+                'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                'max': ordered[-1],
+                'deferred': self.deferred.get(name, 0)
+            }
+        return stats
+
+
+def _age(interaction: Interaction) -> float:
+    """Seconds since Discord received the interaction"""
+    return max(0.0, (nextcord.utils.utcnow() - interaction.created_at).total_seconds())
+
+
+async def _send(interaction: Interaction, *args, **kwargs):
+    if interaction.response.is_done():
+        return await interaction.followup.send(*args, **kwargs)
+    return await interaction.response.send_message(*args, **kwargs)
@@ -1,107 +1,246 @@
 import json
 import os
-from typing import Dict, Optional, Set
+from typing import Dict, List, Optional, Set
 from datetime import datetime, timedelta
+from autorole import CompiledRules, make_rule
+from shards import ShardStore
+from name_filter import NamePolicy
+
+CONFIG_DIR = 'server_config'  # one shard per guild
+LEGACY_CONFIG_FILE = 'server_config.json'  # single file used before sharding, migrated on load
 
 class ServerConfig:
+    """Per-guild configuration and join history
+
+    The state of each guild is stored in its own shard file, loaded on first use and
+    unloaded once idle. The dictionaries below only hold the loaded guilds; guilds with
+    scheduled work (pending role expiries, sticky messages) always stay loaded.
+    """
+
     def __init__(self):
-        self.autorole_config: Dict[int, Dict] = {}  # guild_id -> config
+        self.autorole_config: Dict[int, Dict] = {}  # guild_id -> {'rules': [rule, ...]}
         self.sticky_messages: Dict[int, Dict] = {}  # guild_id -> channel_id -> config
-        self.joined_members: Dict[int, Set[int]] = {}  # guild_id -> set of member_ids
+        self.joined_members: Dict[int, Dict[int, int]] = {}  # guild_id -> member_id -> last join timestamp
         self.member_join_dates: Dict[int, Dict[int, datetime]] = {}  # guild_id -> member_id -> join_date
+        self.member_roles: Dict[int, Dict[int, List[int]]] = {}  # guild_id -> member_id -> role_ids with a pending expiry
+        self.retention_config: Dict[int, Dict] = {}  # guild_id -> retention rules
+        self._compiled_rules: Dict[int, CompiledRules] = {}  # guild_id -> compiled autorole rules
+        self.name_policies: Dict[int, Dict] = {}  # guild_id -> {'terms': [...], 'max_length': n}
+        self._compiled_policies: Dict[int, NamePolicy] = {}  # guild_id -> policy with its term matcher
+        self.store = ShardStore(CONFIG_DIR, self._load_guild, self._dump_guild, self._drop_guild)
         
     def save_config(self):
-        """Save configuration to file"""
+        """Write the modified guilds back to their shard files"""
+        self.store.flush()
+    
+    def evict_idle(self) -> List[int]:
+        """Unload the guilds that have not been used for a while. Returns their ids."""
+        return self.store.evict()
+    
+    def load_config(self):
+        """Split the legacy configuration file if there is one, then preload the guilds with scheduled work"""
+        if os.path.exists(LEGACY_CONFIG_FILE):
+            self._migrate_legacy()
+        self.store.preload()
+    
+    def _migrate_legacy(self):
+        try:
+            with open(LEGACY_CONFIG_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading configuration: {e}")
+            return
+        
+        # The legacy file has one section per kind of state, each keyed by guild
+        shards: Dict[int, Dict] = {}
+        for section, guilds in data.items():
+            for guild_id, value in guilds.items():
+                shards.setdefault(int(guild_id), {})[section] = value
+        pinned = [
+            guild_id for guild_id, shard in shards.items()
+            if shard.get('sticky_messages') or shard.get('member_roles') or shard.get('member_join_dates')
+        ]
+        self.store.import_legacy(shards, pinned)
+        os.replace(LEGACY_CONFIG_FILE, LEGACY_CONFIG_FILE + '.bak')
+        print(f"Configuration of {len(shards)} guilds split into {CONFIG_DIR}/")
+    
+    def _load_guild(self, guild_id: int, data: Dict):
+        """Parse the shard of a guild into the loaded state"""
+        # Older files stored a single role per guild
+        if 'autorole' in data:
+            self.autorole_config[guild_id] = self._upgrade_autorole(data['autorole'])
+        
+        if 'sticky_messages' in data:
+            self.sticky_messages[guild_id] = {
+                int(channel_id): config
+                for channel_id, config in data['sticky_messages'].items()
+            }
+        
+        # Older files only stored a list of ids
+        members = data.get('joined_members')
+        if members is not None:
+            now = int(datetime.now().timestamp())
+            self.joined_members[guild_id] = (
+                {int(member_id): now for member_id in members}
+                if isinstance(members, list) else
+                {int(member_id): int(joined_at) for member_id, joined_at in members.items()}
+            )
+        
+        if 'member_join_dates' in data:
+            self.member_join_dates[guild_id] = {
+                int(member_id): datetime.fromisoformat(join_date)
+                for member_id, join_date in data['member_join_dates'].items()
+            }
+        
+        # Older files only tracked the single autorole
+        # Members without an expiring role are left out: they would pin the guild for nothing
+        member_roles = {}
+        if 'member_roles' in data:
+            member_roles = {
+                int(member_id): role_ids
+                for member_id, role_ids in data['member_roles'].items()
+                if role_ids
+            }
+        elif guild_id in self.member_join_dates:
+            role_ids = list(self._compiled(guild_id).expiries)
+            if role_ids:
+                member_roles = {member_id: role_ids for member_id in self.member_join_dates[guild_id]}
+        if member_roles:
+            self.member_roles[guild_id] = member_roles
+        
+        if 'retention' in data:
+            self.retention_config[guild_id] = data['retention']
+        
+        if 'name_policy' in data:
+            self.name_policies[guild_id] = data['name_policy']
+        self._update_pin(guild_id)
+    
+    def _dump_guild(self, guild_id: int) -> Dict:
+        """Serialize the loaded state of a guild, empty sections are left out"""
         data = {
-            'autorole': {
-                str(guild_id): config
-                for guild_id, config in self.autorole_config.items()
-            },
+            'autorole': self.autorole_config.get(guild_id),
             'sticky_messages': {
-                str(guild_id): {
-                    str(channel_id): config
-                    for channel_id, config in channels.items()
-                }
-                for guild_id, channels in self.sticky_messages.items()
+                str(channel_id): config
+                for channel_id, config in self.sticky_messages.get(guild_id, {}).items()
             },
             'joined_members': {
-                str(guild_id): list(members)
-                for guild_id, members in self.joined_members.items()
+                str(member_id): joined_at
+                for member_id, joined_at in self.joined_members.get(guild_id, {}).items()
             },
             'member_join_dates': {
-                str(guild_id): {
-                    str(member_id): join_date.isoformat()
-                    for member_id, join_date in members.items()
-                }
-                for guild_id, members in self.member_join_dates.items()
-            }
+                str(member_id): join_date.isoformat()
+                for member_id, join_date in self.member_join_dates.get(guild_id, {}).items()
+            },
+            'member_roles': {
+                str(member_id): role_ids
+                for member_id, role_ids in self.member_roles.get(guild_id, {}).items()
+            },
+            'retention': self.retention_config.get(guild_id),
+            'name_policy': self.name_policies.get(guild_id)
         }
-        
-        with open('server_config.json', 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        return {section: value for section, value in data.items() if value}
     
-    def load_config(self):
-        """Load configuration from file"""
-        if not os.path.exists('server_config.json'):
-            return
-        
-        try:
-            with open('server_config.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Load autorole config
-            self.autorole_config = {
-                int(guild_id): config
-                for guild_id, config in data.get('autorole', {}).items()
-            }
-            
-            # Load sticky messages
-            self.sticky_messages = {
-                int(guild_id): {
-                    int(channel_id): config
-                    for channel_id, config in channels.items()
-                }
-                for guild_id, channels in data.get('sticky_messages', {}).items()
-            }
-            
-            # Load joined members
-            self.joined_members = {
-                int(guild_id): set(map(int, members))
-                for guild_id, members in data.get('joined_members', {}).items()
-            }
-            
-            # Load member join dates
-            self.member_join_dates = {
-                int(guild_id): {
-                    int(member_id): datetime.fromisoformat(join_date)
-                    for member_id, join_date in members.items()
-                }
-                for guild_id, members in data.get('member_join_dates', {}).items()
-            }
-        except Exception as e:
-            print(f"Error loading configuration: {e}")
+    def _drop_guild(self, guild_id: int):
+        for state in (self.autorole_config, self.sticky_messages, self.joined_members,
+                      self.member_join_dates, self.member_roles, self.retention_config, self._compiled_rules,
+                      self.name_policies, self._compiled_policies):
+            state.pop(guild_id, None)
+    
+    def _update_pin(self, guild_id: int):
+        self.store.pin(guild_id, bool(self.sticky_messages.get(guild_id) or self.member_roles.get(guild_id)))
+    
+    def _changed(self, guild_id: int):
+        """Schedule the write-back of a guild after a change"""
+        self._update_pin(guild_id)
+        self.store.mark_dirty(guild_id)
+    
+    @staticmethod
+    def _upgrade_autorole(config: Dict) -> Dict:
+        """Convert a single role autorole configuration to the rule list format"""
+        if 'rules' in config:
+            return config
+        return {'rules': [make_rule(
+            config['role_id'],
+            expiry_minutes=config.get('expiry_minutes'),
+            rejoin='first' if config.get('check_rejoin') else 'any'
+        )]}
     
     def set_autorole(self, guild_id: int, role_id: int, expiry_minutes: Optional[int] = None, check_rejoin: bool = False):
-        """Configure autorole for a guild"""
-        self.autorole_config[guild_id] = {
-            'role_id': role_id,
-            'expiry_minutes': expiry_minutes,
-            'check_rejoin': check_rejoin
-        }
-        self.save_config()
+        """Configure autorole for a guild, replacing all its rules with a single role"""
+        self.store.touch(guild_id)
+        self.autorole_config[guild_id] = {'rules': [make_rule(
+            role_id,
+            expiry_minutes=expiry_minutes,
+            rejoin='first' if check_rejoin else 'any'
+        )]}
+        self._compiled_rules.pop(guild_id, None)
+        self._changed(guild_id)
+    
+    def add_autorole_rule(self, guild_id: int, rule: Dict):
+        """Add an autorole rule to a guild, replacing the existing rule for the same role"""
+        self.store.touch(guild_id)
+        rules = [r for r in self._rules(guild_id) if r['role_id'] != rule['role_id']]
+        rules.append(rule)
+        self.autorole_config[guild_id] = {'rules': rules}
+        self._compiled_rules.pop(guild_id, None)
+        self._changed(guild_id)
+    
+    def remove_autorole_rule(self, guild_id: int, role_id: int) -> bool:
+        """Remove the autorole rule for a role. Returns True if a rule was removed."""
+        self.store.touch(guild_id)
+        if not self._drop_rule(guild_id, role_id):
+            return False
+        self._changed(guild_id)
+        return True
+    
+    def _drop_rule(self, guild_id: int, role_id: int) -> bool:
+        rules = self._rules(guild_id)
+        remaining = [rule for rule in rules if rule['role_id'] != role_id]
+        if len(remaining) == len(rules):
+            return False
+        
+        if remaining:
+            self.autorole_config[guild_id] = {'rules': remaining}
+        else:
+            del self.autorole_config[guild_id]
+        self._compiled_rules.pop(guild_id, None)
+        return True
     
     def remove_autorole(self, guild_id: int):
         """Remove autorole configuration for a guild"""
+        self.store.touch(guild_id)
         if guild_id in self.autorole_config:
             del self.autorole_config[guild_id]
-            self.save_config()
+            self._compiled_rules.pop(guild_id, None)
+            self._changed(guild_id)
     
     def get_autorole(self, guild_id: int) -> Optional[Dict]:
         """Get autorole configuration for a guild"""
+        self.store.touch(guild_id)
         return self.autorole_config.get(guild_id)
     
+    def get_autorole_rules(self, guild_id: int) -> List[Dict]:
+        """Get the autorole rules of a guild"""
+        self.store.touch(guild_id)
+        return self._rules(guild_id)
+    
+    def _rules(self, guild_id: int) -> List[Dict]:
+        return self.autorole_config.get(guild_id, {}).get('rules', [])
+    
+    def get_compiled_rules(self, guild_id: int) -> CompiledRules:
+        """Get the autorole rules of a guild compiled into predicates, compiling them on first use"""
+        self.store.touch(guild_id)
+        return self._compiled(guild_id)
+    
+    def _compiled(self, guild_id: int) -> CompiledRules:
+        compiled = self._compiled_rules.get(guild_id)
+        if compiled is None:
+            compiled = self._compiled_rules[guild_id] = CompiledRules(self._rules(guild_id))
+        return compiled
+    
     def set_sticky_message(self, guild_id: int, channel_id: int, content: str, last_message_id: Optional[int] = None):
         """Set sticky message for a channel"""
+        self.store.touch(guild_id)
         if guild_id not in self.sticky_messages:
             self.sticky_messages[guild_id] = {}
         
@@ -109,105 +248,357 @@ class ServerConfig:
             'content': content,
             'last_message_id': last_message_id
         }
-        self.save_config()
+        self._changed(guild_id)
     
     def remove_sticky_message(self, guild_id: int, channel_id: int):
         """Remove sticky message from a channel"""
+        self.store.touch(guild_id)
         if guild_id in self.sticky_messages and channel_id in self.sticky_messages[guild_id]:
             del self.sticky_messages[guild_id][channel_id]
             if not self.sticky_messages[guild_id]:
                 del self.sticky_messages[guild_id]
-            self.save_config()
+            self._changed(guild_id)
     
     def get_sticky_message(self, guild_id: int, channel_id: int) -> Optional[Dict]:
         """Get sticky message configuration for a channel"""
+        self.store.touch(guild_id)
         return self.sticky_messages.get(guild_id, {}).get(channel_id)
     
     def update_sticky_message_id(self, guild_id: int, channel_id: int, message_id: int):
         """Update the last message ID for a sticky message"""
+        self.store.touch(guild_id)
         if guild_id in self.sticky_messages and channel_id in self.sticky_messages[guild_id]:
             self.sticky_messages[guild_id][channel_id]['last_message_id'] = message_id
-            self.save_config()
+            self._changed(guild_id)
     
-    def add_joined_member(self, guild_id: int, member_id: int):
-        """Record that a member has joined the guild before"""
-        if guild_id not in self.joined_members:
-            self.joined_members[guild_id] = set()
-        self.joined_members[guild_id].add(member_id)
+    def add_joined_member(self, guild_id: int, member_id: int, granted_role_ids: Optional[List[int]] = None):
+        """Record that a member has joined the guild and which autoroles they received
         
-        if guild_id not in self.member_join_dates:
-            self.member_join_dates[guild_id] = {}
-        self.member_join_dates[guild_id][member_id] = datetime.now()
+        Only the data the autorole rules actually read is kept: the join id when a rule
+        depends on rejoins, and the join date while a granted role has an expiry.
+        """
+        compiled = self.get_compiled_rules(guild_id)
+        now = datetime.now()
+        changed = False
         
-        self.save_config()
+        if compiled.tracks_rejoin:
+            if guild_id not in self.joined_members:
+                self.joined_members[guild_id] = {}
+            self.joined_members[guild_id][member_id] = int(now.timestamp())
+            changed = True
+        
+        expiring = [role_id for role_id in granted_role_ids or [] if role_id in compiled.expiries]
+        if expiring:
+            if guild_id not in self.member_join_dates:
+                self.member_join_dates[guild_id] = {}
+            self.member_join_dates[guild_id][member_id] = now
+            if guild_id not in self.member_roles:
+                self.member_roles[guild_id] = {}
+            self.member_roles[guild_id][member_id] = expiring
+            changed = True
+        
+        if changed:
+            self._changed(guild_id)
     
     def has_member_joined_before(self, guild_id: int, member_id: int) -> bool:
         """Check if a member has joined the guild before"""
-        return member_id in self.joined_members.get(guild_id, set())
+        self.store.touch(guild_id)
+        return member_id in self.joined_members.get(guild_id, {})
     
-    def get_expired_roles(self) -> Dict[int, Set[int]]:
-        """Get members whose roles should expire"""
-        expired_roles = {}
+    def clear_expired_roles(self, guild_id: int, handled: Dict[int, Set[int]]):
+        """Forget the role expiries that have been handled, and the join date once none is pending"""
+        if not handled:
+            return
+        
+        self.store.touch(guild_id)
+        members = self.member_roles.get(guild_id, {})
+        for member_id, role_ids in handled.items():
+            remaining = [role_id for role_id in members.get(member_id, []) if role_id not in role_ids]
+            if remaining:
+                members[member_id] = remaining
+            else:
+                members.pop(member_id, None)
+                self.member_join_dates.get(guild_id, {}).pop(member_id, None)
+        
+        if not members:
+            self.member_roles.pop(guild_id, None)
+        if not self.member_join_dates.get(guild_id, True):
+            del self.member_join_dates[guild_id]
+        self._changed(guild_id)
+    
+    def forget_channel(self, guild_id: int, channel_id: int) -> bool:
+        """Drop the state tied to a deleted channel, without saving
+        
+        Returns:
+            bool: True if anything was removed and the configuration needs saving
+        """
+        self.store.touch(guild_id)
+        channels = self.sticky_messages.get(guild_id)
+        if not channels or channel_id not in channels:
+            return False
+        
+        del channels[channel_id]
+        if not channels:
+            del self.sticky_messages[guild_id]
+        self._changed(guild_id)
+        return True
+    
+    def forget_role(self, guild_id: int, role_id: int) -> bool:
+        """Drop the autorole configuration and join history tied to a deleted role, without saving
+        
+        Returns:
+            bool: True if anything was removed and the configuration needs saving
+        """
+        self.store.touch(guild_id)
+        if not self._drop_rule(guild_id, role_id):
+            return False
+        
+        members = self.member_roles.get(guild_id, {})
+        for member_id in list(members):
+            members[member_id] = [r for r in members[member_id] if r != role_id]
+            if not members[member_id]:
+                del members[member_id]
+                self.member_join_dates.get(guild_id, {}).pop(member_id, None)
+        if guild_id not in self.autorole_config:
+            self.joined_members.pop(guild_id, None)
+            self.member_join_dates.pop(guild_id, None)
+            self.member_roles.pop(guild_id, None)
+        self._changed(guild_id)
+        return True
+    
+    def forget_guild(self, guild_id: int) -> bool:
+        """Drop all the state of a guild along with its shard file
+        
+        Returns:
+            bool: True if any state was loaded for the guild
+        """
+        removed = guild_id in self.store.loaded
+        self.store.delete(guild_id)
+        return removed
+    
+    def set_retention(self, guild_id: int, max_age_days: Optional[int]):
+        """Set how many days rejoin ids are kept for a guild (None keeps them while check_rejoin is enabled)"""
+        self.store.touch(guild_id)
+        if max_age_days:
+            self.retention_config[guild_id] = {'max_age_days': max_age_days}
+        else:
+            self.retention_config.pop(guild_id, None)
+        self._changed(guild_id)
+    
+    def add_banned_terms(self, guild_id: int, terms: List[str]) -> int:
+        """Add terms to the channel name filter of a guild. Returns the number of new terms."""
+        self.store.touch(guild_id)
+        policy = self.name_policies.get(guild_id, {'terms': [], 'max_length': None})
+        known = set(policy['terms'])
+        added = [term for term in dict.fromkeys(terms) if term and term not in known]
+        if added:
+            policy['terms'] = sorted(known.union(added))
+            self._set_policy(guild_id, policy)
+        return len(added)
+    
+    def remove_banned_terms(self, guild_id: int, terms: List[str]) -> int:
+        """Remove terms from the channel name filter of a guild. Returns the number of removed terms."""
+        self.store.touch(guild_id)
+        policy = self.name_policies.get(guild_id)
+        if not policy:
+            return 0
+        removed_terms = set(terms)
+        remaining = [term for term in policy['terms'] if term not in removed_terms]
+        removed = len(policy['terms']) - len(remaining)
+        if removed:
+            policy['terms'] = remaining
+            self._set_policy(guild_id, policy)
+        return removed
+    
+    def set_name_max_length(self, guild_id: int, max_length: Optional[int]):
+        """Limit the length of member names in channel names (None keeps only Discord's limit)"""
+        self.store.touch(guild_id)
+        policy = self.name_policies.get(guild_id, {'terms': []})
+        policy['max_length'] = max_length or None
+        self._set_policy(guild_id, policy)
+    
+    def _set_policy(self, guild_id: int, policy: Dict):
+        if policy['terms'] or policy['max_length']:
+            self.name_policies[guild_id] = policy
+        else:
+            self.name_policies.pop(guild_id, None)
+        compiled = self._compiled_policies.get(guild_id)
+        if compiled is not None:
+            if compiled.terms == tuple(policy['terms']):
+                compiled.max_length = policy.get('max_length')  # Same terms, the matcher is kept
+            else:
+                del self._compiled_policies[guild_id]
+        self._changed(guild_id)
+    
+    def get_banned_terms(self, guild_id: int) -> List[str]:
+        """Get the channel name filter terms of a guild"""
+        self.store.touch(guild_id)
+        return self.name_policies.get(guild_id, {}).get('terms', [])
+    
+    def get_name_policy(self, guild_id: int) -> NamePolicy:
+        """Get the channel name policy of a guild, its matcher is only rebuilt when the terms change"""
+        self.store.touch(guild_id)
+        compiled = self._compiled_policies.get(guild_id)
+        if compiled is None:
+            policy = self.name_policies.get(guild_id, {})
+            compiled = self._compiled_policies[guild_id] = NamePolicy(policy.get('terms', []), policy.get('max_length'))
+        return compiled
+    
+    def _history_sizes(self, guild_id: Optional[int] = None) -> Dict[str, int]:
+        if guild_id is not None:
+            return {
+                'joined_members': len(self.joined_members.get(guild_id, {})),
+                'join_dates': len(self.member_join_dates.get(guild_id, {})),
+                'file_bytes': self.store.shard_bytes(guild_id)
+            }
+        return {
+            'joined_members': sum(len(members) for members in self.joined_members.values()),
+            'join_dates': sum(len(dates) for dates in self.member_join_dates.values()),
+            'file_bytes': self.store.total_bytes()
+        }
+    
+    def compact_join_history(self, guild_id: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+        """Apply the retention rules to the join history of one guild, or of all the loaded guilds
+        
+        Rejoin ids are kept only while a rule depends on rejoins (and younger than the
+        optional max age), join dates only while a granted role still has an expiry rule.
+        Unloaded guilds are compacted the next time they are loaded and this runs.
+        
+        Returns:
+            Dict[str, Dict[str, int]]: The entry counts and shard file sizes (of that guild only when
+            one is given) before and after compaction
+        """
+        scope = guild_id
+        if scope is not None:
+            self.store.touch(scope)
+        self.save_config()
+        before = self._history_sizes(scope)
         now = datetime.now()
+        changed: Set[int] = set()
         
-        for guild_id, config in self.autorole_config.items():
-            if not config.get('expiry_minutes'):
+        for guild_id in [g for g in self.joined_members if scope is None or g == scope]:
+            if not self._compiled(guild_id).tracks_rejoin:
+                del self.joined_members[guild_id]
+                changed.add(guild_id)
                 continue
-                
-            expiry_date = now - timedelta(minutes=config['expiry_minutes'])
-            expired_members = {
-                member_id
-                for member_id, join_date in self.member_join_dates.get(guild_id, {}).items()
-                if join_date <= expiry_date
+            
+            max_age_days = self.retention_config.get(guild_id, {}).get('max_age_days')
+            if max_age_days:
+                cutoff = (now - timedelta(days=max_age_days)).timestamp()
+                members = {
+                    member_id: joined_at
+                    for member_id, joined_at in self.joined_members[guild_id].items()
+                    if joined_at >= cutoff
+                }
+                if len(members) == len(self.joined_members[guild_id]):
+                    continue
+                if members:
+                    self.joined_members[guild_id] = members
+                else:
+                    del self.joined_members[guild_id]
+                changed.add(guild_id)
+        
+        for guild_id in [g for g in self.member_roles if scope is None or g == scope]:
+            expiries = self._compiled(guild_id).expiries
+            members = {
+                member_id: [role_id for role_id in role_ids if role_id in expiries]
+                for member_id, role_ids in self.member_roles[guild_id].items()
             }
+            members = {member_id: role_ids for member_id, role_ids in members.items() if role_ids}
+            if members == self.member_roles[guild_id]:
+                continue
+            if members:
+                self.member_roles[guild_id] = members
+            else:
+                del self.member_roles[guild_id]
+            changed.add(guild_id)
+        
+        for guild_id in [g for g in self.member_join_dates if scope is None or g == scope]:
+            pending = self.member_roles.get(guild_id, {})
+            dates = {member_id: date for member_id, date in self.member_join_dates[guild_id].items() if member_id in pending}
+            if len(dates) == len(self.member_join_dates[guild_id]):
+                continue
+            if dates:
+                self.member_join_dates[guild_id] = dates
+            else:
+                del self.member_join_dates[guild_id]
+            changed.add(guild_id)
+        
+        for guild_id in changed:
+            self._changed(guild_id)
+        self.save_config()
+        return {'before': before, 'after': self._history_sizes(scope)}
+    
+    def get_expired_roles(self) -> Dict[int, Dict[int, Set[int]]]:
+        """Get the roles that should expire, as guild_id -> member_id -> role_ids
+        
+        Guilds with pending expiries are pinned, so they are always loaded.
+        """
+        expired_roles = {}
+        now = datetime.now()
+        
+        for guild_id, members in self.member_roles.items():
+            expiries = self._compiled(guild_id).expiries
+            join_dates = self.member_join_dates.get(guild_id, {})
             
-            if expired_members:
-                expired_roles[guild_id] = expired_members
+            for member_id, role_ids in members.items():
+                join_date = join_dates.get(member_id)
+                if not join_date:
+                    continue
+                expired = {
+                    role_id
+                    for role_id in role_ids
+                    if role_id in expiries and join_date + timedelta(minutes=expiries[role_id]) <= now
+                }
+                if expired:
+                    expired_roles.setdefault(guild_id, {})[member_id] = expired
         
         return expired_roles
 
-    def get_time_left_before_role_expiry(self, guild_id: int, member_id: int) -> Optional[int]:
+    def get_time_left_before_role_expiry(self, guild_id: int, member_id: int, role_id: Optional[int] = None) -> Optional[int]:
         """Get the number of minutes left before a member's role expires
         
         Args:
             guild_id: The ID of the guild
             member_id: The ID of the member
+            role_id: The ID of the role, or None for the first role to expire
             
         Returns:
             Optional[int]: The number of minutes left before expiry, or None if no expiry set
                           Returns 0 if the role has already expired
         """
-        config = self.get_autorole(guild_id)
-        if not config or not config.get('expiry_minutes'):
+        expiry_time = self.get_role_expiry_time(guild_id, member_id, role_id)
+        if expiry_time is None:
             return None
             
-        join_date = self.member_join_dates.get(guild_id, {}).get(member_id)
-        if not join_date:
-            return None
-            
-        expiry_time = join_date + timedelta(minutes=config['expiry_minutes'])
-        time_left = expiry_time - datetime.now()
-        minutes_left = int(time_left.total_seconds() / 60)
+        minutes_left = int((expiry_time - datetime.now().timestamp()) / 60)
         
         return max(0, minutes_left)  # Don't return negative minutes
 
-    def get_role_expiry_time(self, guild_id: int, member_id: int) -> Optional[float]:
+    def get_role_expiry_time(self, guild_id: int, member_id: int, role_id: Optional[int] = None) -> Optional[float]:
         """Get the expiry time for a member's role
         
         Args:
             guild_id: The ID of the guild
             member_id: The ID of the member
+            role_id: The ID of the role, or None for the first role to expire
             
         Returns:
             Optional[float]: The expiry time as a Unix timestamp, or None if no expiry
         """
-        config = self.get_autorole(guild_id)
-        if not config or not config.get('expiry_minutes'):
-            return None
-            
+        self.store.touch(guild_id)
         join_date = self.member_join_dates.get(guild_id, {}).get(member_id)
         if not join_date:
             return None
             
-        expiry_time = join_date + timedelta(minutes=config['expiry_minutes'])
-        return expiry_time.timestamp() 
\ No newline at end of file
+        expiries = self._compiled(guild_id).expiries
+        pending = [
+            expiries[pending_role_id]
+            for pending_role_id in self.member_roles.get(guild_id, {}).get(member_id, [])
+            if pending_role_id in expiries and (role_id is None or pending_role_id == role_id)
+        ]
+        if not pending:
+            return None
+            
+        expiry_time = join_date + timedelta(minutes=min(pending))
+        return expiry_time.timestamp()
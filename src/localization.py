@@ -55,14 +55,29 @@ LOCALES = {
                 '- expiry_minutes: Remove role after X minutes\n'
                 '- check_rejoin: Don\'t give role to rejoining members\n'
                 '\n'
+                '!config autorole_add <role> [expiry_minutes] [min_account_age_days] [bots] [rejoin]\n'
+                '- Add a rule, several roles can be given on join\n'
+                '\n'
+                '!config autorole_remove <role>\n'
+                '- Remove the rule of a role\n'
+                '\n'
                 '!config remove_autorole\n'
                 '- Disable auto-role feature\n'
                 '\n'
+                '!config retention <max_age_days>\n'
+                '- Days to remember members for check_rejoin\n'
+                '\n'
                 '!config sticky <channel> <message>\n'
                 '- Set sticky message in channel\n'
                 '\n'
                 '!config remove_sticky <channel>\n'
                 '- Remove sticky message from channel\n'
+                '\n'
+                '!config name_filter_add <terms> / name_filter_remove <terms>\n'
+                '- Mask banned terms in temp channel names\n'
+                '\n'
+                '!config name_length <max_length>\n'
+                '- Limit member names in temp channel names\n'
                 '```'
             ),
             'help_title': '!help',
@@ -102,7 +117,8 @@ LOCALES = {
                 'Template: `{template}`\n'
                 'Position: {position}\n'
             ),
-            'default_position': 'Default'
+            'default_position': 'Default',
+            'list_page': 'Page {page}/{pages}'
         },
         'config': {
             'autorole': {
@@ -111,18 +127,77 @@ LOCALES = {
                 'expiry_set': 'Role will be removed after {minutes} minutes!',
                 'expiry_disabled': 'Role expiry has been disabled!',
                 'rejoin_enabled': 'Role will not be given to rejoining members!',
-                'rejoin_disabled': 'Role will be given to all new members!'
+                'rejoin_disabled': 'Role will be given to all new members!',
+                'rule_added': 'Auto-role rule for {role} has been saved! ({count} rules configured)',
+                'rule_removed': 'Auto-role rule for {role} has been removed!',
+                'rule_not_found': 'No auto-role rule found for {role}!'
+            },
+            'retention': {
+                'set_success': (
+                    'Rejoining members will be remembered for {days} days!\n'
+                    '- Rejoin ids: {members_before} → {members_after}\n'
+                    '- Join dates: {dates_before} → {dates_after}\n'
+                    '- File size: {bytes_before} → {bytes_after} bytes'
+                )
             },
             'sticky': {
                 'set_success': 'Sticky message has been set in {channel}!',
                 'remove_success': 'Sticky message has been disabled in {channel}!',
                 'content_updated': 'Sticky message content has been updated!'
             },
+            'name_filter': {
+                'added': '{count} terms added to the channel name filter ({total} in total).',
+                'removed': '{count} terms removed from the channel name filter ({total} left).',
+                'length_set': 'Member names are limited to {length} characters in channel names.',
+                'length_removed': 'Member names are now only limited by Discord\'s 100 characters limit.'
+            },
             'language': {
                 'set_success': 'Language has been set to English!',
                 'invalid': 'Invalid language! Available languages: {langs}'
             }
         },
+        'voice': {
+            'not_in_channel': 'You must be in a temporary voice channel to use this command!',
+            'not_owner': 'Only the owner of this channel can use this command!',
+            'already_owner': 'You already own this channel!',
+            'owner_present': 'The owner of this channel is still in it!',
+            'locked': 'Your channel is now locked.',
+            'unlocked': 'Your channel is now unlocked.',
+            'limit_set': 'User limit set to {limit}.',
+            'permitted': '{member} can now join your channel.',
+            'rejected': '{member} has been removed from your channel.',
+            'reject_self': 'You cannot reject yourself!',
+            'claimed': 'You are now the owner of {channel}!'
+        },
+        'stats': {
+            'title': '📊 Voice Channel Statistics',
+            'no_data': 'No temporary voice channel activity recorded on this server yet!',
+            'live': 'Live channels',
+            'peak_hour': 'Peak concurrent (1h)',
+            'peak_day': 'Peak concurrent (24h)',
+            'created_hour': 'Created (1h)',
+            'created_per_hour': 'Created per hour (24h avg)',
+            'median_lifetime': 'Median lifetime (24h)',
+            'reused_hour': 'Sent back to own channel (1h)',
+            'throttled_hour': 'Throttled joins (1h)'
+        },
+        'debug': {
+            'loop_title': '🩺 Event Loop Watchdog',
+            'loop_lag': 'Loop lag: current {current}ms, average {average}ms, max {max}ms',
+            'task_drift': 'Average delay: {average}ms, worst delay: {worst}ms',
+            'offenders': 'Blocking calls',
+            'warmup': 'Warm-up',
+            'warmup_progress': '{done}/{total} catch-up jobs done',
+            'no_offenders': 'No blocking call detected.',
+            'profile_running': 'A profiling session is already running!',
+            'profile_started': 'Profiling event handlers and background loops for {seconds} seconds...',
+            'profile_done': 'Profile written to `{path}.txt` and `{path}.collapsed`',
+            'profile_line': '{name}: {calls} calls, wall {wall}ms, cpu {cpu}ms, rest {rest}ms',
+            'profile_empty': 'No handler ran during the profiling window.',
+            'commands_title': 'Slash command latency (automatic defer after {budget}s)',
+            'command_latency': '{count} calls — p50 {p50}ms, p95 {p95}ms, max {max}ms — deferred {deferred}x',
+            'no_commands': 'No slash command has been used since the bot started.'
+        },
         'errors': {
             'missing_permissions': '❌ You need administrator permissions to use this command!'
         }
@@ -181,14 +256,29 @@ LOCALES = {
                 '- expiry_minutes: Retirer le rôle après X minutes\n'
                 '- check_rejoin: Ne pas donner le rôle aux membres qui rejoignent à nouveau\n'
                 '\n'
+                '!config autorole_add <role> [expiry_minutes] [min_account_age_days] [bots] [rejoin]\n'
+                '- Ajouter une règle, plusieurs rôles peuvent être donnés\n'
+                '\n'
+                '!config autorole_remove <role>\n'
+                '- Retirer la règle d\'un rôle\n'
+                '\n'
                 '!config remove_autorole\n'
                 '- Désactiver la fonction de rôle automatique\n'
                 '\n'
+                '!config retention <max_age_days>\n'
+                '- Jours de mémorisation des membres pour check_rejoin\n'
+                '\n'
                 '!config sticky <channel> <message>\n'
                 '- Définir un message épinglé dans un salon\n'
                 '\n'
                 '!config remove_sticky <channel>\n'
                 '- Retirer le message épinglé d\'un salon\n'
+                '\n'
+                '!config name_filter_add <terms> / name_filter_remove <terms>\n'
+                '- Masquer des termes interdits dans les noms des salons temporaires\n'
+                '\n'
+                '!config name_length <max_length>\n'
+                '- Limiter le nom des membres dans les noms des salons temporaires\n'
                 '```'
             ),
             'help_title': '!help',
@@ -228,7 +318,8 @@ LOCALES = {
                 'Modèle : `{template}`\n'
                 'Position : {position}\n'
             ),
-            'default_position': 'Par défaut'
+            'default_position': 'Par défaut',
+            'list_page': 'Page {page}/{pages}'
         },
         'config': {
             'autorole': {
@@ -237,18 +328,77 @@ LOCALES = {
                 'expiry_set': 'Le rôle sera retiré après {minutes} minutes !',
                 'expiry_disabled': 'L\'expiration du rôle a été désactivée !',
                 'rejoin_enabled': 'Le rôle ne sera pas donné aux membres qui rejoignent à nouveau !',
-                'rejoin_disabled': 'Le rôle sera donné à tous les nouveaux membres !'
+                'rejoin_disabled': 'Le rôle sera donné à tous les nouveaux membres !',
+                'rule_added': 'La règle de rôle automatique pour {role} a été enregistrée ! ({count} règles configurées)',
+                'rule_removed': 'La règle de rôle automatique pour {role} a été supprimée !',
+                'rule_not_found': 'Aucune règle de rôle automatique trouvée pour {role} !'
+            },
+            'retention': {
+                'set_success': (
+                    'Les membres qui rejoignent à nouveau seront mémorisés pendant {days} jours !\n'
+                    '- Identifiants mémorisés : {members_before} → {members_after}\n'
+                    '- Dates d\'arrivée : {dates_before} → {dates_after}\n'
+                    '- Taille du fichier : {bytes_before} → {bytes_after} octets'
+                )
             },
             'sticky': {
                 'set_success': 'Le message épinglé a été défini dans {channel} !',
                 'remove_success': 'Le message épinglé a été désactivé dans {channel} !',
                 'content_updated': 'Le contenu du message épinglé a été mis à jour !'
             },
+            'name_filter': {
+                'added': '{count} termes ajoutés au filtre des noms de salons ({total} au total).',
+                'removed': '{count} termes retirés du filtre des noms de salons ({total} restants).',
+                'length_set': 'Les noms des membres sont limités à {length} caractères dans les noms de salons.',
+                'length_removed': 'Les noms des membres ne sont plus limités que par la limite de 100 caractères de Discord.'
+            },
             'language': {
                 'set_success': 'La langue a été définie sur Français !',
                 'invalid': 'Langue invalide ! Langues disponibles : {langs}'
             }
         },
+        'voice': {
+            'not_in_channel': 'Vous devez être dans un salon vocal temporaire pour utiliser cette commande !',
+            'not_owner': 'Seul le propriétaire de ce salon peut utiliser cette commande !',
+            'already_owner': 'Vous êtes déjà propriétaire de ce salon !',
+            'owner_present': 'Le propriétaire de ce salon y est toujours !',
+            'locked': 'Votre salon est maintenant verrouillé.',
+            'unlocked': 'Votre salon est maintenant déverrouillé.',
+            'limit_set': 'Limite d\'utilisateurs définie sur {limit}.',
+            'permitted': '{member} peut maintenant rejoindre votre salon.',
+            'rejected': '{member} a été retiré de votre salon.',
+            'reject_self': 'Vous ne pouvez pas vous retirer vous-même !',
+            'claimed': 'Vous êtes maintenant propriétaire de {channel} !'
+        },
+        'stats': {
+            'title': '📊 Statistiques des salons vocaux',
+            'no_data': 'Aucune activité de salon vocal temporaire enregistrée sur ce serveur !',
+            'live': 'Salons actifs',
+            'peak_hour': 'Pic simultané (1h)',
+            'peak_day': 'Pic simultané (24h)',
+            'created_hour': 'Créés (1h)',
+            'created_per_hour': 'Créés par heure (moy. 24h)',
+            'median_lifetime': 'Durée de vie médiane (24h)',
+            'reused_hour': 'Renvoyés vers leur salon (1h)',
+            'throttled_hour': 'Créations limitées (1h)'
+        },
+        'debug': {
+            'loop_title': '🩺 Surveillance de la boucle d\'événements',
+            'loop_lag': 'Latence de la boucle : actuelle {current}ms, moyenne {average}ms, max {max}ms',
+            'task_drift': 'Retard moyen : {average}ms, pire retard : {worst}ms',
+            'offenders': 'Appels bloquants',
+            'warmup': 'Préchauffage',
+            'warmup_progress': '{done}/{total} tâches de rattrapage effectuées',
+            'no_offenders': 'Aucun appel bloquant détecté.',
+            'profile_running': 'Un profilage est déjà en cours !',
+            'profile_started': 'Profilage des événements et des tâches de fond pendant {seconds} secondes...',
+            'profile_done': 'Profil écrit dans `{path}.txt` et `{path}.collapsed`',
+            'profile_line': '{name} : {calls} appels, total {wall}ms, cpu {cpu}ms, rest {rest}ms',
+            'profile_empty': 'Aucun événement n\'a été traité pendant le profilage.',
+            'commands_title': 'Latence des commandes slash (report automatique après {budget}s)',
+            'command_latency': '{count} appels — p50 {p50}ms, p95 {p95}ms, max {max}ms — reportées {deferred}x',
+            'no_commands': 'Aucune commande slash n\'a été utilisée depuis le démarrage du bot.'
+        },
         'errors': {
             'missing_permissions': '❌ Vous avez besoin des permissions d\'administrateur pour utiliser cette commande !'
         }
@@ -1,12 +1,26 @@
 import os
 import json
+import hashlib
 import nextcord
 from nextcord import Interaction, SlashOption
-from nextcord.ext import commands, tasks
+from nextcord.ext import application_checks, commands, tasks
 from dotenv import load_dotenv
-from typing import Dict, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 from localization import Localization
 from config import ServerConfig
+from analytics import VoiceAnalytics
+from watchdog import LoopWatchdog
+from voice_controls import EditCoalescer, get_member_overwrite, get_overwrites
+from profiler import HandlerProfiler, MAX_PROFILE_SECONDS
+from throttle import CreationThrottle
+from warmup import WarmupScheduler, WARMUP_WINDOW
+from autorole import BOT_FILTERS, REJOIN_FILTERS, make_rule
+from command_guard import CommandGuard
+from shards import ShardStore
+from shutdown import GracefulShutdown, SHUTDOWN_DEADLINE
+from preferences import ChannelPreferences, DEFAULT_BITRATE
+from name_filter import CHANNEL_NAME_LIMIT
+from recorder import EventRecorder
 import asyncio
 from nextcord import Activity, ActivityType
 from datetime import datetime
@@ -21,18 +35,37 @@ intents.message_content = True
 intents.members = True  # Required for autorole
 
 activity = Activity(type=ActivityType.playing, name="Fully Open-Source")
-bot = commands.Bot(intents=intents, activity=activity)
+# Les membres sont mis en cache au fil des événements plutôt que demandés pour chaque serveur au démarrage
+bot = commands.Bot(intents=intents, activity=activity, chunk_guilds_at_startup=False)
+# on_ready est aussi appelé après chaque reconnexion complète : le démarrage ne doit être fait qu'une fois
+startup_done = False
 
 # Initialize localization and server config
 loc = Localization()
 server_config = ServerConfig()
+voice_analytics = VoiceAnalytics()
+loop_watchdog = LoopWatchdog()
+edit_coalescer = EditCoalescer()
+handler_profiler = HandlerProfiler()
+creation_throttle = CreationThrottle()
+warmup = WarmupScheduler(float(os.getenv('WARMUP_SECONDS', WARMUP_WINDOW)))
+command_guard = CommandGuard()
+channel_preferences = ChannelPreferences()
+event_recorder = EventRecorder()
+graceful_shutdown = GracefulShutdown(float(os.getenv('SHUTDOWN_SECONDS', SHUTDOWN_DEADLINE)))
+
+# Nombre maximum de salons dans une catégorie Discord
+CATEGORY_CHANNEL_LIMIT = 50
 
 class VoiceCreatorConfig:
-    def __init__(self, channel_id: int, template_name: str, position: str = "after", user_limit: int = 0):
+    def __init__(self, channel_id: int, template_name: str, position: str = "after", user_limit: int = 0,
+                 overflow_template: str = "{category} {n}", overflow_categories: Optional[List[int]] = None):
         self.channel_id = channel_id
         self.template_name = template_name
         self.position = position  # "before" ou "after"
         self.user_limit = user_limit
+        self.overflow_template = overflow_template  # {category} = catégorie du créateur, {n} = numéro
+        self.overflow_categories = overflow_categories or []  # catégories de débordement, dans l'ordre
     
     def to_dict(self) -> dict:
         """Convertit la configuration en dictionnaire pour la sauvegarde JSON"""
@@ -40,7 +73,9 @@ class VoiceCreatorConfig:
             'channel_id': self.channel_id,
             'template_name': self.template_name,
             'position': self.position,
-            'user_limit': self.user_limit
+            'user_limit': self.user_limit,
+            'overflow_template': self.overflow_template,
+            'overflow_categories': self.overflow_categories
         }
     
     @classmethod
@@ -50,10 +85,13 @@ class VoiceCreatorConfig:
             channel_id=data['channel_id'],
             template_name=data['template_name'],
             position=data.get('position', 'after'),
-            user_limit=data.get('user_limit', 0)
+            user_limit=data.get('user_limit', 0),
+            overflow_template=data.get('overflow_template', "{category} {n}"),
+            overflow_categories=data.get('overflow_categories', [])
         )
 
-# Dictionnaire pour stocker les configurations des créateurs de salons vocaux par serveur
+# Dictionnaire pour stocker les configurations des créateurs de salons vocaux des serveurs chargés
+# (voir get_guild_configs)
 # Format: guild_id -> Dict[creator_channel_id, VoiceCreatorConfig]
 guild_configs: Dict[int, Dict[int, VoiceCreatorConfig]] = {}
 
@@ -61,67 +99,160 @@ guild_configs: Dict[int, Dict[int, VoiceCreatorConfig]] = {}
 # Format: guild_id -> Set[channel_id]
 created_channels: Dict[int, Set[int]] = {}
 
-CONFIG_FILE = 'voice_creators.json'
+# Dictionnaire pour suivre le propriétaire de chaque salon créé
+# Format: guild_id -> Dict[channel_id, owner_member_id]
+channel_owners: Dict[int, Dict[int, int]] = {}
 
-def save_configs():
-    """Sauvegarde les configurations dans un fichier JSON"""
-    data = {
-        str(guild_id): {
-            str(channel_id): config.to_dict()
-            for channel_id, config in configs.items()
-        }
-        for guild_id, configs in guild_configs.items()
+# Créateur d'origine et nom généré de chaque salon créé, pour retenir ce que le propriétaire y a changé
+# Format: guild_id -> Dict[channel_id, (creator_channel_id, default_name)]
+channel_origins: Dict[int, Dict[int, Tuple[int, str]]] = {}
+
+# Salons en cours de création par catégorie, pas encore visibles dans le cache
+# Format: category_id -> nombre de salons réservés
+reserved_slots: Dict[int, int] = {}
+# Salons déjà créés dont l'événement CHANNEL_CREATE n'est pas encore arrivé
+# Format: category_id -> Set[channel_id]
+uncached_channels: Dict[int, Set[int]] = {}
+category_lock = asyncio.Lock()
+
+# Cache des pages de /listvoice par serveur, invalidé quand l'ensemble des créateurs change
+# Format: guild_id -> {'language', 'index': List[creator_id], 'pages': Dict[page, Embed]}
+creator_list_cache: Dict[int, Dict] = {}
+CREATORS_PER_PAGE = 10
+
+CONFIG_DIR = 'voice_creators'  # un fichier par serveur
+LEGACY_CONFIG_FILE = 'voice_creators.json'  # ancien fichier unique, découpé au démarrage
+SHARD_FLUSH_SECONDS = 30
+COMMAND_CACHE_FILE = 'command_sync.json'
+
+def load_guild_configs(guild_id: int, data: dict):
+    """Charge les créateurs d'un serveur depuis son fichier"""
+    guild_configs[guild_id] = {
+        int(channel_id): VoiceCreatorConfig.from_dict(config_data)
+        for channel_id, config_data in data.items()
     }
-    
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
-    print(f"Configurations saved to {CONFIG_FILE}")
+    # Les salons supprimés pendant que le bot était hors ligne n'ont pas reçu de CHANNEL_DELETE
+    evict_missing_creators(guild_id)
+
+def dump_guild_configs(guild_id: int) -> dict:
+    """Convertit les créateurs d'un serveur pour son fichier"""
+    return {
+        str(channel_id): config.to_dict()
+        for channel_id, config in guild_configs.get(guild_id, {}).items()
+    }
+
+def drop_guild_configs(guild_id: int):
+    """Décharge les créateurs d'un serveur inactif"""
+    guild_configs.pop(guild_id, None)
+    creator_list_cache.pop(guild_id, None)
+
+# Un fichier par serveur, chargé au premier événement et déchargé après inactivité
+voice_shards = ShardStore(CONFIG_DIR, load_guild_configs, dump_guild_configs, drop_guild_configs)
+
+def get_guild_configs(guild_id: int) -> Dict[int, VoiceCreatorConfig]:
+    """Retourne les créateurs d'un serveur, en chargeant son fichier au premier accès"""
+    voice_shards.touch(guild_id)
+    return guild_configs[guild_id]
+
+def save_configs(guild_id: int):
+    """Programme l'écriture des créateurs d'un serveur, faite par flush_shards"""
+    voice_shards.mark_dirty(guild_id)
 
 def load_configs():
-    """Charge les configurations depuis le fichier JSON"""
+    """Découpe l'ancien fichier unique en un fichier par serveur s'il existe encore"""
     try:
-        if not os.path.exists(CONFIG_FILE):
+        if not os.path.exists(LEGACY_CONFIG_FILE):
             return
         
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        with open(LEGACY_CONFIG_FILE, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
-        for guild_id_str, configs in data.items():
-            guild_id = int(guild_id_str)
-            guild_configs[guild_id] = {
-                int(channel_id): VoiceCreatorConfig.from_dict(config_data)
-                for channel_id, config_data in configs.items()
-            }
-        print(f"Configurations loaded from {CONFIG_FILE}")
+        voice_shards.import_legacy({int(guild_id): configs for guild_id, configs in data.items()})
+        os.replace(LEGACY_CONFIG_FILE, LEGACY_CONFIG_FILE + '.bak')
+        print(f"Configurations of {len(data)} guilds split into {CONFIG_DIR}/")
     except Exception as e:
         print(f"Erreur lors du chargement des configurations : {e}")
 
+def get_commands_hash() -> str:
+    """Calcule une empreinte stable des définitions des commandes (localisations comprises)"""
+    payloads = sorted(
+        (command.get_payload(None) for command in bot.get_all_application_commands() if command.is_global),
+        key=lambda payload: payload['name']
+    )
+    data = json.dumps(payloads, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+def load_command_cache() -> Optional[dict]:
+    """Charge l'empreinte des commandes enregistrées lors de la dernière synchronisation"""
+    try:
+        if not os.path.exists(COMMAND_CACHE_FILE):
+            return None
+        with open(COMMAND_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading command cache: {e}")
+        return None
+
+def save_command_cache(data: dict):
+    """Sauvegarde l'empreinte des commandes synchronisées"""
+    with open(COMMAND_CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+
+@bot.event
+async def on_connect():
+    """Register slash commands with Discord only when their definitions changed"""
+    bot.add_all_application_commands()
+
+    cache = {'application_id': bot.application_id, 'hash': get_commands_hash()}
+    force_sync = os.getenv('FORCE_COMMAND_SYNC', '').lower() in ('1', 'true', 'yes')
+    if not force_sync and load_command_cache() == cache:
+        # Commands are associated lazily with their Discord ids on first use
+        print("Slash commands unchanged, skipping sync")
+        return
+
+    await bot.sync_application_commands(guild_id=None)
+    save_command_cache(cache)
+    print("Slash commands synced with Discord")
+
 @bot.event
 async def on_ready():
     """Bot startup event"""
+    global startup_done
     print(f'Bot ready! Connected as {bot.user.name}')
+    if startup_done:
+        # Reconnexion (nouvel IDENTIFY) : l'état en mémoire est plus récent que les fichiers
+        print("Reconnected, keeping the state in memory")
+        return
+    startup_done = True
 
     # Load configurations at startup
     load_configs()
     server_config.load_config()
-    
-    # Print autorole information for each guild
+    voice_analytics.load_stats()
+
+    # Les serveurs reçus avant le chargement n'ont pas encore été vérifiés par on_guild_available
     for guild in bot.guilds:
-        config = server_config.get_autorole(guild.id)
-        if config:
-            role = guild.get_role(config['role_id'])
+        evict_missing_channels(guild)
+    
+    # Print autorole information for the preloaded guilds, the others are loaded on their first event
+    for guild_id in list(server_config.store.loaded):
+        guild = bot.get_guild(guild_id)
+        if not guild:
+            continue
+        for rule in server_config.get_autorole_rules(guild.id):
+            role = guild.get_role(rule['role_id'])
             if role:
                 print(f"\nAutorole information for {guild.name}:")
                 print(f"Role: {role.name}")
                 
-                # Get members with the role
+                # Get the cached members with the role (members are not chunked at startup)
                 members_with_role = [member for member in guild.members if role in member.roles]
                 
                 if members_with_role:
                     print(f"Members with {role.name}:")
                     for member in members_with_role:
                         # Get expiry time if set
-                        expiry_time = server_config.get_role_expiry_time(guild.id, member.id)
+                        expiry_time = server_config.get_role_expiry_time(guild.id, member.id, role.id)
                         if expiry_time:
                             current_time = datetime.now().timestamp()
                             remaining_time = expiry_time - current_time
@@ -135,155 +266,234 @@ async def on_ready():
                 else:
                     print("No members currently have this role")
     
+    # Spread the catch-up work due after the restart over the warm-up window
+    if not warmup.running:
+        queue_warmup_jobs()
+        asyncio.create_task(warmup.run())
+
+    # Enregistrer les événements consommés par les handlers quand RECORD_EVENTS est défini, pour replay.py
+    if os.getenv('RECORD_EVENTS', '').lower() in ('1', 'true', 'yes') and not event_recorder.active:
+        print(f"Recording events to {event_recorder.start()}")
+        bot.add_listener(record_voice_state, 'on_voice_state_update')
+        bot.add_listener(record_member_join, 'on_member_join')
+        bot.add_listener(record_message, 'on_message')
+
+    # Arrêt propre sur SIGTERM/SIGINT au lieu de l'arrêt immédiat de bot.run
+    graceful_shutdown.install(lambda signal_name: asyncio.create_task(shutdown(signal_name)))
+
     # Start background tasks
+    loop_watchdog.start()
     check_role_expiry.start()
     check_sticky_messages.start()
-    
-    # Vérifier que les salons créateurs existent toujours
-    invalid_configs = []
-    for guild_id, configs in guild_configs.items():
-        guild = bot.get_guild(guild_id)
-        if not guild:
-            invalid_configs.append((guild_id, None))
-            continue
-            
-        invalid_channels = []
-        for channel_id in configs.keys():
-            channel = guild.get_channel(channel_id)
-            if not channel:
-                invalid_channels.append(channel_id)
-        
-        if invalid_channels:
-            for channel_id in invalid_channels:
-                del configs[channel_id]
-            if not configs:
-                invalid_configs.append((guild_id, None))
-    
-    # Nettoyer les configurations invalides
-    for guild_id, _ in invalid_configs:
-        if guild_id in guild_configs:
-            del guild_configs[guild_id]
-    
-    # Sauvegarder les configurations nettoyées
-    save_configs()
+    roll_voice_stats.start()
+    compact_join_history.start()
+    flush_shards.start()
+
+    # Profile the handlers from startup when PROFILE_HANDLERS is set to a number of seconds
+    profile_seconds = os.getenv('PROFILE_HANDLERS')
+    if profile_seconds and not handler_profiler.active:
+        asyncio.create_task(run_profiler(float(profile_seconds)))
 
 @tasks.loop(seconds=30)
 async def check_role_expiry():
     """Check and remove expired roles"""
+    loop_watchdog.record_tick('check_role_expiry', 30)
     expired_roles = server_config.get_expired_roles()
     
-    for guild_id, member_ids in expired_roles.items():
-        guild = bot.get_guild(guild_id)
-        if not guild:
-            continue
-            
-        config = server_config.get_autorole(guild_id)
-        if not config:
-            continue
-            
-        role = guild.get_role(config['role_id'])
-        if not role:
-            continue
-            
-        for member_id in member_ids:
+    for guild_id, members in expired_roles.items():
+        # Members whose expiry is being caught up by the warm-up are left to it
+        members = {
+            member_id: role_ids
+            for member_id, role_ids in members.items()
+            if not warmup.is_pending(('role', guild_id, member_id))
+        }
+        if members:
+            await remove_expired_roles(guild_id, members)
+
+async def remove_expired_roles(guild_id: int, members: Dict[int, Set[int]]):
+    """Remove expired autoroles, with a single member edit per member"""
+    guild = bot.get_guild(guild_id)
+    if not guild:
+        return
+        
+    handled = {}
+    for member_id, role_ids in members.items():
+        if not graceful_shutdown.accepting:
+            break
+        with graceful_shutdown.track('role'):
             member = guild.get_member(member_id)
-            if member and role in member.roles:
+            if member is None:
+                # Members are not chunked at startup, fetch the ones not seen since
                 try:
-                    await member.remove_roles(role)
-                    print(f"Removed role {role.name} from {member.display_name}")
+                    member = await guild.fetch_member(member_id)
+                except nextcord.NotFound:
+                    member = None  # The member left the guild
                 except nextcord.HTTPException:
-                    print(f"Error removing role {role.name} from {member.display_name}")
-                    pass
+                    continue
+            expired = [role for role in member.roles if role.id in role_ids] if member else []
+            if expired:
+                try:
+                    await member.edit(roles=[role for role in member.roles if not role.is_default() and role not in expired])
+                    print(f"Removed roles {', '.join(role.name for role in expired)} from {member.display_name}")
+                except nextcord.HTTPException:
+                    print(f"Error removing roles {', '.join(role.name for role in expired)} from {member.display_name}")
+                    continue
+            handled[member_id] = role_ids
+    
+    # The expiry is no longer pending for these roles
+    server_config.clear_expired_roles(guild_id, handled)
+
+@tasks.loop(hours=1)
+async def compact_join_history():
+    """Apply the join history retention rules"""
+    report = server_config.compact_join_history()
+    before, after = report['before'], report['after']
+    print(
+        f"Compacted join history: {before['joined_members']} -> {after['joined_members']} rejoin ids, "
+        f"{before['join_dates']} -> {after['join_dates']} join dates, "
+        f"{before['file_bytes']} -> {after['file_bytes']} bytes"
+    )
+
+@tasks.loop(seconds=SHARD_FLUSH_SECONDS)
+async def flush_shards():
+    """Write back the modified guild shards and unload the idle ones"""
+    server_config.save_config()
+    server_config.evict_idle()
+    voice_shards.flush()
+    voice_shards.evict()
+    channel_preferences.save()
+    channel_preferences.evict_idle()
+    event_recorder.flush()
 
 @tasks.loop(seconds=5)
 async def check_sticky_messages():
     """Check and maintain sticky messages every 5 seconds"""
-    for guild_id, channels in server_config.sticky_messages.items():
-        guild = bot.get_guild(guild_id)
-        if not guild:
-            continue
+    loop_watchdog.record_tick('check_sticky_messages', 5)
+    # Itérer sur des copies : les listeners peuvent retirer des entrées pendant les await
+    for guild_id, channels in list(server_config.sticky_messages.items()):
+        for channel_id in list(channels):
+            # Channels whose catch-up repost is scheduled by the warm-up are left to it
+            if not warmup.is_pending(('sticky', guild_id, channel_id)):
+                await maintain_sticky_message(guild_id, channel_id)
 
-        for channel_id, sticky_config in channels.items():
-            channel = guild.get_channel(channel_id)
-            if not channel:
-                continue
+async def maintain_sticky_message(guild_id: int, channel_id: int):
+    """Repost the sticky message of a channel if it is no longer the last message"""
+    guild = bot.get_guild(guild_id)
+    sticky_config = server_config.get_sticky_message(guild_id, channel_id)
+    if not guild or not sticky_config:
+        return
+
+    channel = guild.get_channel(channel_id)
+    if not channel:
+        # Channel deleted while the bot was offline: evict it like the delete listener would
+        if not guild.unavailable and server_config.forget_channel(guild_id, channel_id):
+            server_config.save_config()
+            print(f"Sticky message removed for guild {guild_id}: channel {channel_id} no longer exists")
+        return
+
+    try:
+        # Get the last message in the channel
+        last_messages = [msg async for msg in channel.history(limit=1)]
+        last_message = last_messages[0] if last_messages else None
 
+        # Get the last sticky message if it exists
+        last_sticky_id = sticky_config.get('last_message_id')
+        last_sticky = None
+        if last_sticky_id:
             try:
-                # Get the last message in the channel
-                last_messages = [msg async for msg in channel.history(limit=1)]
-                last_message = last_messages[0] if last_messages else None
-                
-                # Get the last sticky message if it exists
-                last_sticky_id = sticky_config.get('last_message_id')
+                last_sticky = await channel.fetch_message(last_sticky_id)
+            except (nextcord.NotFound, nextcord.HTTPException):
                 last_sticky = None
-                if last_sticky_id:
-                    try:
-                        last_sticky = await channel.fetch_message(last_sticky_id)
-                    except (nextcord.NotFound, nextcord.HTTPException):
-                        last_sticky = None
-
-                # If the last message isn't our sticky message, we need to repost it
-                if not last_message or last_message.id != sticky_config.get('last_message_id'):
-                    # Delete the old sticky message if it exists
-                    if last_sticky:
-                        try:
-                            await last_sticky.delete()
-                            print(f"Deleted old sticky message in channel {channel_id}")
-                        except nextcord.HTTPException:
-                            pass
-
-                    # Post new sticky message
-                    new_message = await channel.send(sticky_config['content'])
-                    sticky_config['last_message_id'] = new_message.id
-                    server_config.update_sticky_message_id(guild_id, channel_id, new_message.id)
-                    print(f"Posted new sticky message in channel {channel_id}")
-
-            except Exception as e:
-                print(f"Error maintaining sticky message in channel {channel_id}: {e}")
+
+        # If the last message isn't our sticky message, we need to repost it
+        if not last_message or last_message.id != sticky_config.get('last_message_id'):
+            # Delete the old sticky message if it exists
+            if last_sticky:
+                try:
+                    await last_sticky.delete()
+                    print(f"Deleted old sticky message in channel {channel_id}")
+                except nextcord.HTTPException:
+                    pass
+
+            # Post new sticky message
+            new_message = await channel.send(sticky_config['content'])
+            sticky_config['last_message_id'] = new_message.id
+            server_config.update_sticky_message_id(guild_id, channel_id, new_message.id)
+            print(f"Posted new sticky message in channel {channel_id}")
+
+    except Exception as e:
+        print(f"Error maintaining sticky message in channel {channel_id}: {e}")
+
+def queue_warmup_jobs():
+    """Queue the catch-up work due after a restart: expired roles and sticky reposts"""
+    for guild_id, members in server_config.get_expired_roles().items():
+        for member_id, role_ids in members.items():
+            warmup.add(('role', guild_id, member_id), lambda g=guild_id, m=member_id, r=role_ids: remove_expired_roles(g, {m: r}))
+
+    for guild_id, channels in server_config.sticky_messages.items():
+        for channel_id in channels:
+            warmup.add(('sticky', guild_id, channel_id), lambda g=guild_id, c=channel_id: maintain_sticky_message(g, c))
+
+@tasks.loop(minutes=1)
+async def roll_voice_stats():
+    """Close finished analytics buckets and persist the rollups every hour"""
+    if voice_analytics.roll_all():
+        voice_analytics.save_stats()
 
 @bot.event
 async def on_member_join(member):
     """Handle new member joins"""
     print(f"New member joined: {member.display_name}")
+    if not graceful_shutdown.accepting:
+        return
     guild_id = member.guild.id
-    config = server_config.get_autorole(guild_id)
-    
-    if config:
-        # Check if we should skip rejoining members
-        if config['check_rejoin'] and server_config.has_member_joined_before(guild_id, member.id):
-            print(f"Skipping rejoining member {member.display_name} because they have already joined before")
-            return
+    if not server_config.get_autorole(guild_id):
+        print(f"No autorole configuration found for guild {guild_id}")
+        return
+
+    # Evaluate the guild's compiled rules against the joining member
+    rejoining = server_config.has_member_joined_before(guild_id, member.id)
+    account_age_days = (nextcord.utils.utcnow() - member.created_at).total_seconds() / 86400
+    role_ids = server_config.get_compiled_rules(guild_id).evaluate(account_age_days, member.bot, rejoining)
+
+    roles = [role for role in map(member.guild.get_role, role_ids) if role]
+    if len(roles) != len(role_ids):
+        print(f"Bad role configuration found for guild {guild_id}")
+    if not roles:
+        print(f"No autorole rule matched {member.display_name}")
+        # No edit attempted: still remember the join so that rejoin rules can match next time
+        server_config.add_joined_member(guild_id, member.id)
+        return
+
+    try:
+        # Apply every role in a single member edit
+        current_roles = [role for role in member.roles if not role.is_default()]
+        with graceful_shutdown.track('role'):
+            await member.edit(roles=current_roles + [role for role in roles if role not in current_roles])
+        server_config.add_joined_member(guild_id, member.id, [role.id for role in roles])
+        print(f"Added roles {', '.join(role.name for role in roles)} to {member.display_name}")
+    except nextcord.HTTPException as e:
+        # Not recorded when the edit failed, so that the roles are given again on the next join
+        # Check if it's a permission error (code 403)
+        if e.code == 50013:  # Missing Permissions error code
+            bot_permissions = member.guild.me.guild_permissions
+            missing_perms = []
             
-        role = member.guild.get_role(config['role_id'])
-        if role:
-            try:
-                await member.add_roles(role)
-                server_config.add_joined_member(guild_id, member.id)
-                print(f"Added role {role.name} to {member.display_name}")
-            except nextcord.HTTPException as e:
-                # Check if it's a permission error (code 403)
-                if e.code == 50013:  # Missing Permissions error code
-                    bot_permissions = member.guild.me.guild_permissions
-                    missing_perms = []
-                    
-                    # Check common required permissions
-                    if not bot_permissions.manage_roles:
-                        missing_perms.append("Manage Roles")
-                    if not bot_permissions.view_audit_log:
-                        missing_perms.append("View Audit Log")
-                    
-                    # Check role hierarchy
-                    if member.guild.me.top_role <= role:
-                        missing_perms.append(f"Role Hierarchy (Bot's highest role must be above {role.name})")
-                    
-                    print(f"Missing Permissions: {', '.join(missing_perms)}")
-                    print(f"Error details: {str(e)}")
-                else:
-                    print(f"Error adding role {role.name} to {member.display_name}, non-permission error: {str(e)}")
+            # Check common required permissions
+            if not bot_permissions.manage_roles:
+                missing_perms.append("Manage Roles")
+            if not bot_permissions.view_audit_log:
+                missing_perms.append("View Audit Log")
+            
+            # Check role hierarchy
+            for role in roles:
+                if member.guild.me.top_role <= role:
+                    missing_perms.append(f"Role Hierarchy (Bot's highest role must be above {role.name})")
+            
+            print(f"Missing Permissions: {', '.join(missing_perms)}")
+            print(f"Error details: {str(e)}")
         else:
-            print(f"Bad role configuration found for guild {guild_id}")
-    else:
-        print(f"No autorole configuration found for guild {guild_id}")
+            print(f"Error adding roles to {member.display_name}, non-permission error: {str(e)}")
 
 @bot.slash_command(name="config", description="Configuration commands group")
 @commands.has_permissions(administrator=True)
@@ -293,19 +503,21 @@ async def config(interaction: Interaction):
 
 @config.subcommand(name="language", description="Set the bot's language for this server")
 @commands.has_permissions(administrator=True)
+@command_guard.guard()
 async def set_language(
     interaction: Interaction,
     language: str = SlashOption(description="The language code to set (e.g. 'en', 'fr')")
 ):
     """Set the bot's language for this server"""
     if loc.set_language(interaction.guild_id, language):
-        await interaction.response.send_message(loc.get_text(interaction.guild_id, 'config.language.set_success'))
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'config.language.set_success'))
     else:
-        await interaction.response.send_message(loc.get_text(interaction.guild_id, 'config.language.invalid', 
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'config.language.invalid', 
                                   langs=', '.join(loc.get_available_languages())))
 
 @config.subcommand(name="autorole", description="Configure auto-role for new members")
 @commands.has_permissions(administrator=True)
+@command_guard.guard()
 async def set_autorole(
     interaction: Interaction,
     role: nextcord.Role = SlashOption(description="The role to automatically assign"),
@@ -315,13 +527,13 @@ async def set_autorole(
     """Configure auto-role for new members"""
     # Validate expiry_minutes if provided
     if expiry_minutes is not None and expiry_minutes <= 0:
-        await interaction.response.send_message("Expiry time must be greater than 0 minutes!")
+        await command_guard.reply(interaction, "Expiry time must be greater than 0 minutes!")
         return
         
     server_config.set_autorole(interaction.guild_id, role.id, expiry_minutes, check_rejoin)
     
     # Send confirmation message
-    await interaction.response.send_message(loc.get_text(interaction.guild_id, 'config.autorole.set_success', role=role.mention))
+    await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'config.autorole.set_success', role=role.mention))
     
     if expiry_minutes:
         await interaction.followup.send(loc.get_text(interaction.guild_id, 'config.autorole.expiry_set', minutes=expiry_minutes))
@@ -329,15 +541,80 @@ async def set_autorole(
     if check_rejoin:
         await interaction.followup.send(loc.get_text(interaction.guild_id, 'config.autorole.rejoin_enabled'))
 
+@config.subcommand(name="autorole_add", description="Add an auto-role rule, several roles can be given to new members")
+@commands.has_permissions(administrator=True)
+@command_guard.guard()
+async def add_autorole_rule(
+    interaction: Interaction,
+    role: nextcord.Role = SlashOption(description="The role to assign when the rule matches"),
+    expiry_minutes: Optional[int] = SlashOption(description="Optional: Minutes until this role expires", required=False, min_value=1),
+    min_account_age_days: Optional[int] = SlashOption(description="Optional: Minimum account age in days", required=False, min_value=1),
+    bots: str = SlashOption(description="Whether the rule applies to bots", choices=BOT_FILTERS, required=False, default='any'),
+    rejoin: str = SlashOption(description="Whether the rule applies to first joins, rejoins or both", choices=REJOIN_FILTERS, required=False, default='any')
+):
+    """Add an auto-role rule"""
+    server_config.add_autorole_rule(interaction.guild_id, make_rule(
+        role.id,
+        expiry_minutes=expiry_minutes,
+        min_account_age_days=min_account_age_days,
+        bots=bots,
+        rejoin=rejoin
+    ))
+    await command_guard.reply(interaction, loc.get_text(
+        interaction.guild_id,
+        'config.autorole.rule_added',
+        role=role.mention,
+        count=len(server_config.get_autorole_rules(interaction.guild_id))
+    ))
+
+@config.subcommand(name="autorole_remove", description="Remove the auto-role rule of a role")
+@commands.has_permissions(administrator=True)
+@command_guard.guard()
+async def remove_autorole_rule(
+    interaction: Interaction,
+    role: nextcord.Role = SlashOption(description="The role whose rule should be removed")
+):
+    """Remove the auto-role rule of a role"""
+    if server_config.remove_autorole_rule(interaction.guild_id, role.id):
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'config.autorole.rule_removed', role=role.mention))
+    else:
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'config.autorole.rule_not_found', role=role.mention))
+
 @config.subcommand(name="remove_autorole", description="Remove auto-role configuration")
 @commands.has_permissions(administrator=True)
+@command_guard.guard()
 async def remove_autorole(interaction: Interaction):
     """Remove auto-role configuration"""
     server_config.remove_autorole(interaction.guild_id)
-    await interaction.response.send_message(loc.get_text(interaction.guild_id, 'config.autorole.remove_success'))
+    await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'config.autorole.remove_success'))
+
+@config.subcommand(name="retention", description="Configure how long the join history is kept")
+@commands.has_permissions(administrator=True)
+@command_guard.guard()
+async def set_retention(
+    interaction: Interaction,
+    max_age_days: int = SlashOption(description="Days to remember members for check_rejoin (0 = while check_rejoin is enabled)", min_value=0)
+):
+    """Configure how long the join history is kept and compact it"""
+    server_config.set_retention(interaction.guild_id, max_age_days)
+    report = server_config.compact_join_history(interaction.guild_id)
+    before, after = report['before'], report['after']
+
+    await command_guard.reply(interaction, loc.get_text(
+        interaction.guild_id,
+        'config.retention.set_success',
+        days=max_age_days if max_age_days else '∞',
+        members_before=before['joined_members'],
+        members_after=after['joined_members'],
+        dates_before=before['join_dates'],
+        dates_after=after['join_dates'],
+        bytes_before=before['file_bytes'],
+        bytes_after=after['file_bytes']
+    ))
 
 @config.subcommand(name="sticky", description="Set a sticky message in a channel")
 @commands.has_permissions(administrator=True)
+@command_guard.guard()
 async def set_sticky(
     interaction: Interaction,
     channel: nextcord.TextChannel = SlashOption(description="The channel to set the sticky message in"),
@@ -345,20 +622,72 @@ async def set_sticky(
 ):
     """Set a sticky message in a channel"""
     server_config.set_sticky_message(interaction.guild_id, channel.id, content, last_message_id=None)
-    await interaction.response.send_message(loc.get_text(interaction.guild_id, 'config.sticky.set_success', channel=channel.mention))
+    await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'config.sticky.set_success', channel=channel.mention))
 
 @config.subcommand(name="remove_sticky", description="Remove sticky message from a channel")
 @commands.has_permissions(administrator=True)
+@command_guard.guard()
 async def remove_sticky(
     interaction: Interaction,
     channel: nextcord.TextChannel = SlashOption(description="The channel to remove the sticky message from")
 ):
     """Remove sticky message from a channel"""
     server_config.remove_sticky_message(interaction.guild_id, channel.id)
-    await interaction.response.send_message(loc.get_text(interaction.guild_id, 'config.sticky.remove_success', channel=channel.mention))
+    await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'config.sticky.remove_success', channel=channel.mention))
+
+def parse_terms(terms: str) -> List[str]:
+    """Découpe une liste de termes séparés par des virgules"""
+    return [term.strip() for term in terms.split(',') if term.strip()]
+
+@config.subcommand(name="name_filter_add", description="Add banned terms, masked in the names of temporary channels")
+@commands.has_permissions(administrator=True)
+@command_guard.guard(ephemeral=True)
+async def add_name_filter(
+    interaction: Interaction,
+    terms: str = SlashOption(description="Terms separated by commas")
+):
+    """Add banned terms, masked in the names of temporary channels"""
+    added = server_config.add_banned_terms(interaction.guild_id, parse_terms(terms))
+    await command_guard.reply(interaction, loc.get_text(
+        interaction.guild_id,
+        'config.name_filter.added',
+        count=added,
+        total=len(server_config.get_banned_terms(interaction.guild_id))
+    ), ephemeral=True)
+
+@config.subcommand(name="name_filter_remove", description="Remove banned terms from the channel name filter")
+@commands.has_permissions(administrator=True)
+@command_guard.guard(ephemeral=True)
+async def remove_name_filter(
+    interaction: Interaction,
+    terms: str = SlashOption(description="Terms separated by commas")
+):
+    """Remove banned terms from the channel name filter"""
+    removed = server_config.remove_banned_terms(interaction.guild_id, parse_terms(terms))
+    await command_guard.reply(interaction, loc.get_text(
+        interaction.guild_id,
+        'config.name_filter.removed',
+        count=removed,
+        total=len(server_config.get_banned_terms(interaction.guild_id))
+    ), ephemeral=True)
+
+@config.subcommand(name="name_length", description="Limit the length of member names in temporary channel names")
+@commands.has_permissions(administrator=True)
+@command_guard.guard()
+async def set_name_length(
+    interaction: Interaction,
+    max_length: int = SlashOption(description="Maximum length of the member name (0 = only Discord's 100 characters limit)", min_value=0, max_value=100)
+):
+    """Limit the length of member names in temporary channel names"""
+    server_config.set_name_max_length(interaction.guild_id, max_length)
+    if max_length:
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'config.name_filter.length_set', length=max_length))
+    else:
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'config.name_filter.length_removed'))
 
 @bot.slash_command(name="setupvoice", description="Creates a voice channel creator with custom parameters")
 @commands.has_permissions(administrator=True)
+@command_guard.guard()
 async def setupvoice(
     interaction: Interaction,
     template_name: str = SlashOption(
@@ -379,6 +708,10 @@ async def setupvoice(
         min_value=0,
         max_value=99,
         default=0
+    ),
+    overflow_template: str = SlashOption(
+        description="Name of overflow categories when the category is full, use {category} and {n}",
+        default="{category} {n}"
     )
 ):
     """Creates a voice channel creator with custom parameters"""
@@ -387,12 +720,17 @@ async def setupvoice(
 
     # Validate template name
     if not template_name or len(template_name) > 100:
-        await interaction.response.send_message("The template name must be between 1 and 100 characters!")
+        await command_guard.reply(interaction, "The template name must be between 1 and 100 characters!")
         return
 
     # Validate creator name
     if not creator_name or len(creator_name) > 100:
-        await interaction.response.send_message("The creator channel name must be between 1 and 100 characters!")
+        await command_guard.reply(interaction, "The creator channel name must be between 1 and 100 characters!")
+        return
+
+    # Validate overflow template
+    if not overflow_template or len(overflow_template) > 100:
+        await command_guard.reply(interaction, "The overflow template must be between 1 and 100 characters!")
         return
 
     # Create voice channel creator
@@ -401,24 +739,22 @@ async def setupvoice(
         category=current_category
     )
 
-    # Initialize guild config if it doesn't exist
-    if guild.id not in guild_configs:
-        guild_configs[guild.id] = {}
-    
-    guild_configs[guild.id][create_channel.id] = VoiceCreatorConfig(
+    get_guild_configs(guild.id)[create_channel.id] = VoiceCreatorConfig(
         channel_id=create_channel.id,
         template_name=template_name,
         position=position,
-        user_limit=user_limit
+        user_limit=user_limit,
+        overflow_template=overflow_template
     )
 
     # Save configurations
-    save_configs()
+    save_configs(guild.id)
+    invalidate_creator_list(guild.id)
 
     location = loc.get_text(interaction.guild_id, 'commands.location_before' if position == "before" else 'commands.location_after')
     limit = loc.get_text(interaction.guild_id, 'commands.limit_unlimited') if user_limit == 0 else str(user_limit)
     
-    await interaction.response.send_message(loc.get_text(
+    await command_guard.reply(interaction, loc.get_text(
         interaction.guild_id,
         'commands.setup_success',
         creator_name=creator_name,
@@ -430,56 +766,270 @@ async def setupvoice(
 
 @bot.slash_command(name="removevoice", description="Removes a voice channel creator")
 @commands.has_permissions(administrator=True)
+@command_guard.guard()
 async def removevoice(
     interaction: Interaction,
     channel: nextcord.VoiceChannel = SlashOption(description="The voice channel creator to remove")
 ):
     """Removes a voice channel creator"""
-    if channel.id in guild_configs.get(interaction.guild_id, {}):
+    if channel.id in get_guild_configs(interaction.guild_id):
         await channel.delete()
-        del guild_configs[interaction.guild_id][channel.id]
-        if not guild_configs[interaction.guild_id]:
-            del guild_configs[interaction.guild_id]
+        # Reprendre la configuration après l'appel : le serveur a pu être déchargé entre-temps
+        get_guild_configs(interaction.guild_id).pop(channel.id, None)
+        channel_preferences.forget_creator(interaction.guild_id, channel.id)
         # Save configurations
-        save_configs()
-        await interaction.response.send_message(loc.get_text(interaction.guild_id, 'commands.remove_success'))
+        save_configs(interaction.guild_id)
+        invalidate_creator_list(interaction.guild_id)
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'commands.remove_success'))
     else:
-        await interaction.response.send_message(loc.get_text(interaction.guild_id, 'commands.remove_error'))
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'commands.remove_error'))
+
+def invalidate_creator_list(guild_id: int):
+    """Invalide les pages de /listvoice d'un serveur"""
+    creator_list_cache.pop(guild_id, None)
+
+def get_creator_list(guild_id: int) -> Dict:
+    """Retourne le cache de /listvoice d'un serveur, en reconstruisant l'index si besoin"""
+    language = loc.guild_languages.get(guild_id, loc.default_language)
+    cache = creator_list_cache.get(guild_id)
+    if cache is None or cache['language'] != language:
+        # Comme la version non paginée, ne pas lister les créateurs dont le salon n'existe plus
+        configs = get_guild_configs(guild_id)
+        evict_missing_creators(guild_id)
+        guild = bot.get_guild(guild_id)
+        cache = creator_list_cache[guild_id] = {
+            'language': language,
+            'index': [creator_id for creator_id in configs if guild and guild.get_channel(creator_id)],
+            'pages': {}
+        }
+    return cache
+
+def get_page_count(guild_id: int) -> int:
+    """Nombre de pages de /listvoice pour un serveur"""
+    return max(1, -(-len(get_creator_list(guild_id)['index']) // CREATORS_PER_PAGE))
+
+def get_creator_page(guild_id: int, page: int) -> nextcord.Embed:
+    """Construit (une seule fois) l'embed d'une page de /listvoice"""
+    cache = get_creator_list(guild_id)
+    if page in cache['pages']:
+        return cache['pages'][page]
+
+    embed = nextcord.Embed(
+        title=loc.get_text(guild_id, 'commands.list_creators'),
+        color=0x00ff00
+    )
+    first = page * CREATORS_PER_PAGE
+    for i, creator_id in enumerate(cache['index'][first:first + CREATORS_PER_PAGE], first + 1):
+        config = get_guild_configs(guild_id)[creator_id]
+        position = config.position if config.position is not None else loc.get_text(guild_id, 'commands.default_position')
+        embed.add_field(name=f"Creator {i}", value=loc.get_text(
+            guild_id,
+            'commands.list_creator_info',
+            channel=f"<#{creator_id}>",
+            template=config.template_name,
+            position=position
+        ), inline=False)
+    embed.set_footer(text=loc.get_text(guild_id, 'commands.list_page', page=page + 1, pages=get_page_count(guild_id)))
+
+    cache['pages'][page] = embed
+    return embed
+
+class CreatorListView(nextcord.ui.View):
+    """Navigation entre les pages de /listvoice"""
+
+    def __init__(self, guild_id: int, user_id: int):
+        super().__init__(timeout=180)
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.page = 0
+        self.update_buttons()
+
+    def update_buttons(self):
+        pages = get_page_count(self.guild_id)
+        self.page = min(self.page, pages - 1)
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= pages - 1
+
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        return interaction.user.id == self.user_id
+
+    async def show_page(self, interaction: Interaction, page: int):
+        self.page = page
+        self.update_buttons()
+        await interaction.response.edit_message(embed=get_creator_page(self.guild_id, self.page), view=self)
+
+    @nextcord.ui.button(label="◀", style=nextcord.ButtonStyle.secondary)
+    async def previous_page(self, button: nextcord.ui.Button, interaction: Interaction):
+        await self.show_page(interaction, self.page - 1)
+
+    @nextcord.ui.button(label="▶", style=nextcord.ButtonStyle.secondary)
+    async def next_page(self, button: nextcord.ui.Button, interaction: Interaction):
+        await self.show_page(interaction, self.page + 1)
 
 @bot.slash_command(name="listvoice", description="Lists all voice channel creators on the server")
 @commands.has_permissions(administrator=True)
+@command_guard.guard()
 async def listvoice(interaction: Interaction):
     """Lists all voice channel creators on the server"""
-    if interaction.guild_id not in guild_configs or not guild_configs[interaction.guild_id]:
-        await interaction.response.send_message(loc.get_text(interaction.guild_id, 'commands.list_none'))
+    if not get_creator_list(interaction.guild_id)['index']:
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'commands.list_none'))
         return
 
-    creators = []
-    for creator_id, config in guild_configs[interaction.guild_id].items():
-        channel = interaction.guild.get_channel(creator_id)
-        if channel:
-            position = config.position if config.position is not None else loc.get_text(interaction.guild_id, 'commands.default_position')
-            creators.append(loc.get_text(
-                interaction.guild_id,
-                'commands.list_creator_info',
-                channel=channel.mention,
-                template=config.template_name,
-                position=position
-            ))
-
-    if creators:
-        embed = nextcord.Embed(
-            title=loc.get_text(interaction.guild_id, 'commands.list_creators'),
-            color=0x00ff00
-        )
-        for i, creator in enumerate(creators, 1):
-            embed.add_field(name=f"Creator {i}", value=creator, inline=False)
-        await interaction.response.send_message(embed=embed)
+    embed = get_creator_page(interaction.guild_id, 0)
+    if get_page_count(interaction.guild_id) == 1:
+        # Pas besoin de navigation pour une seule page
+        await command_guard.reply(interaction, embed=embed)
     else:
-        await interaction.response.send_message(loc.get_text(interaction.guild_id, 'commands.list_none_active'))
+        await command_guard.reply(interaction, embed=embed, view=CreatorListView(interaction.guild_id, interaction.user.id))
+
+async def get_owned_channel(interaction: Interaction, claiming: bool = False) -> Optional[nextcord.VoiceChannel]:
+    """Return the temp channel the user is in if they own it (or may claim it), otherwise reply with an error"""
+    voice = interaction.user.voice
+    channel = voice.channel if voice else None
+    if not channel or channel.id not in created_channels.get(interaction.guild_id, set()):
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.not_in_channel'), ephemeral=True)
+        return None
+
+    owner_id = channel_owners.get(interaction.guild_id, {}).get(channel.id)
+    if claiming:
+        if owner_id == interaction.user.id:
+            await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.already_owner'), ephemeral=True)
+            return None
+        if owner_id in {m.id for m in channel.members}:
+            await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.owner_present'), ephemeral=True)
+            return None
+    elif owner_id != interaction.user.id:
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.not_owner'), ephemeral=True)
+        return None
+
+    return channel
+
+@bot.slash_command(name="voice", description="Manage your temporary voice channel")
+async def voice(interaction: Interaction):
+    """Temporary voice channel owner commands group"""
+    pass
+
+@voice.subcommand(name="lock", description="Prevent other members from joining your channel")
+@command_guard.guard(ephemeral=True)
+async def voice_lock(interaction: Interaction):
+    """Prevent other members from joining your channel"""
+    channel = await get_owned_channel(interaction)
+    if channel:
+        edit_coalescer.queue_permissions(channel, interaction.guild.default_role, connect=False)
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.locked'), ephemeral=True)
+
+@voice.subcommand(name="unlock", description="Allow everyone to join your channel again")
+@command_guard.guard(ephemeral=True)
+async def voice_unlock(interaction: Interaction):
+    """Allow everyone to join your channel again"""
+    channel = await get_owned_channel(interaction)
+    if channel:
+        edit_coalescer.queue_permissions(channel, interaction.guild.default_role, connect=None)
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.unlocked'), ephemeral=True)
+
+@voice.subcommand(name="limit", description="Set the user limit of your channel")
+@command_guard.guard(ephemeral=True)
+async def voice_limit(
+    interaction: Interaction,
+    user_limit: int = SlashOption(description="User limit (0 = unlimited)", min_value=0, max_value=99)
+):
+    """Set the user limit of your channel"""
+    channel = await get_owned_channel(interaction)
+    if channel:
+        edit_coalescer.queue_options(channel, user_limit=user_limit)
+        limit = loc.get_text(interaction.guild_id, 'commands.limit_unlimited') if user_limit == 0 else str(user_limit)
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.limit_set', limit=limit), ephemeral=True)
+
+@voice.subcommand(name="permit", description="Allow a member to join your channel even when it is locked")
+@command_guard.guard(ephemeral=True)
+async def voice_permit(
+    interaction: Interaction,
+    member: nextcord.Member = SlashOption(description="The member to allow")
+):
+    """Allow a member to join your channel even when it is locked"""
+    channel = await get_owned_channel(interaction)
+    if channel:
+        edit_coalescer.queue_permissions(channel, member, view_channel=True, connect=True)
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.permitted', member=member.mention), ephemeral=True)
+
+@voice.subcommand(name="reject", description="Remove a member from your channel and prevent them from rejoining")
+@command_guard.guard(ephemeral=True)
+async def voice_reject(
+    interaction: Interaction,
+    member: nextcord.Member = SlashOption(description="The member to reject")
+):
+    """Remove a member from your channel and prevent them from rejoining"""
+    channel = await get_owned_channel(interaction)
+    if not channel:
+        return
+    if member.id == interaction.user.id:
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.reject_self'), ephemeral=True)
+        return
+
+    # Apply the deny before disconnecting the member, otherwise they could rejoin until the coalesced edit
+    edit_coalescer.queue_permissions(channel, member, connect=False)
+    await edit_coalescer.flush(channel.id)
+    if member.voice and member.voice.channel == channel:
+        await member.move_to(None)
+    await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.rejected', member=member.mention), ephemeral=True)
+
+@voice.subcommand(name="claim", description="Become the owner of your channel when its owner has left")
+@command_guard.guard(ephemeral=True)
+async def voice_claim(interaction: Interaction):
+    """Become the owner of your channel when its owner has left"""
+    channel = await get_owned_channel(interaction, claiming=True)
+    if channel:
+        previous_owner_id = channel_owners.setdefault(interaction.guild_id, {}).get(channel.id)
+        channel_owners[interaction.guild_id][channel.id] = interaction.user.id
+        # The previous owner goes back to the permissions the category gives them
+        if previous_owner_id is not None:
+            previous_owner = interaction.guild.get_member(previous_owner_id) or nextcord.Object(previous_owner_id)
+            category_overwrite = get_member_overwrite(channel.category, previous_owner_id) if channel.category else None
+            edit_coalescer.queue_overwrite(channel, previous_owner, category_overwrite)
+        edit_coalescer.queue_permissions(channel, interaction.user, view_channel=True, connect=True)
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'voice.claimed', channel=channel.mention), ephemeral=True)
+
+def format_duration(seconds: float) -> str:
+    """Format a duration in seconds as a short human readable string"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    return f"{minutes}m {seconds:02d}s"
+
+@bot.slash_command(name="voicestats", description="Shows temporary voice channel statistics for this server")
+@commands.has_permissions(administrator=True)
+@command_guard.guard()
+async def voicestats(interaction: Interaction):
+    """Shows temporary voice channel statistics for this server"""
+    stats = voice_analytics.get_summary(interaction.guild_id)
+    if not stats:
+        await command_guard.reply(interaction, loc.get_text(interaction.guild_id, 'stats.no_data'))
+        return
+
+    median_lifetime = stats['median_lifetime']
+    values = {
+        'live': str(stats['live']),
+        'peak_hour': str(stats['peak_hour']),
+        'peak_day': str(stats['peak_day']),
+        'created_hour': str(stats['created_hour']),
+        'created_per_hour': f"{stats['created_per_hour']:.1f}",
+        'reused_hour': str(stats['reused_hour']),
+        'throttled_hour': str(stats['throttled_hour']),
+        'median_lifetime': format_duration(median_lifetime) if median_lifetime is not None else '-'
+    }
+
+    embed = nextcord.Embed(
+        title=loc.get_text(interaction.guild_id, 'stats.title'),
+        color=0x00ff00
+    )
+    for key, value in values.items():
+        embed.add_field(name=loc.get_text(interaction.guild_id, f'stats.{key}'), value=value, inline=True)
+    await command_guard.reply(interaction, embed=embed)
 
 @bot.slash_command(name="help", description="Display bot help")
 @commands.has_permissions(administrator=True)
+@command_guard.guard()
 async def cmds_help(interaction: Interaction):
     """Display bot help (Admin only)"""
     embed = nextcord.Embed(
@@ -533,69 +1083,567 @@ async def cmds_help(interaction: Interaction):
     # Footer with version
     embed.set_footer(text=loc.get_text(interaction.guild_id, 'help.footer'))
 
-    await interaction.response.send_message(embed=embed)
+    await command_guard.reply(interaction, embed=embed)
+
+# Les checks de commands ne s'appliquent pas aux slash commands : Discord masque le groupe aux
+# non-administrateurs et application_checks le vérifie aussi à l'exécution
+@bot.slash_command(name="debug", description="Diagnostic commands group",
+                   default_member_permissions=nextcord.Permissions(administrator=True))
+@application_checks.has_permissions(administrator=True)
+async def debug(interaction: Interaction):
+    """Diagnostic commands group"""
+    pass
+
+@debug.subcommand(name="loop", description="Show event loop lag and the calls that blocked it the longest")
+@application_checks.has_permissions(administrator=True)
+@command_guard.guard(ephemeral=True)
+async def debug_loop(interaction: Interaction):
+    """Show event loop lag and the calls that blocked it the longest"""
+    lag = loop_watchdog.get_lag_stats()
+    embed = nextcord.Embed(
+        title=loc.get_text(interaction.guild_id, 'debug.loop_title'),
+        description=loc.get_text(
+            interaction.guild_id,
+            'debug.loop_lag',
+            current=f"{lag['current'] * 1000:.1f}",
+            average=f"{lag['average'] * 1000:.1f}",
+            max=f"{lag['max'] * 1000:.1f}"
+        ),
+        color=0x00ff00
+    )
+
+    for name, drift in loop_watchdog.get_task_drift().items():
+        average = drift['total'] / drift['count'] if drift['count'] else 0.0
+        embed.add_field(
+            name=f"{name} ({drift['nominal']}s)",
+            value=loc.get_text(
+                interaction.guild_id,
+                'debug.task_drift',
+                average=f"{average * 1000:.0f}",
+                worst=f"{drift['worst'] * 1000:.0f}"
+            ),
+            inline=False
+        )
+
+    if warmup.running:
+        embed.add_field(
+            name=loc.get_text(interaction.guild_id, 'debug.warmup'),
+            value=loc.get_text(interaction.guild_id, 'debug.warmup_progress', done=warmup.done, total=warmup.total),
+            inline=False
+        )
+
+    offenders = loop_watchdog.get_worst_offenders()
+    if not offenders:
+        embed.add_field(name=loc.get_text(interaction.guild_id, 'debug.offenders'), value=loc.get_text(interaction.guild_id, 'debug.no_offenders'), inline=False)
+    for offender in offenders:
+        embed.add_field(
+            name=f"{offender['location']} — {offender['worst'] * 1000:.0f}ms x{offender['count']}",
+            value=f"```\n{offender['stack'][-1000:]}```",
+            inline=False
+        )
+
+    await command_guard.reply(interaction, embed=embed, ephemeral=True)
+
+@debug.subcommand(name="commands", description="Show the response latency of slash commands")
+@application_checks.has_permissions(administrator=True)
+@command_guard.guard(ephemeral=True)
+async def debug_commands(interaction: Interaction):
+    """Show the response latency of slash commands"""
+    stats = command_guard.get_latency_stats()
+    embed = nextcord.Embed(
+        title=loc.get_text(interaction.guild_id, 'debug.commands_title', budget=command_guard.budget),
+        color=0x00ff00
+    )
+    if not stats:
+        embed.description = loc.get_text(interaction.guild_id, 'debug.no_commands')
+    for name, latency in sorted(stats.items(), key=lambda item: item[1]['p95'], reverse=True)[:25]:
+        embed.add_field(
+            name=f"/{name}",
+            value=loc.get_text(
+                interaction.guild_id,
+                'debug.command_latency',
+                count=latency['count'],
+                p50=f"{latency['p50'] * 1000:.0f}",
+                p95=f"{latency['p95'] * 1000:.0f}",
+                max=f"{latency['max'] * 1000:.0f}",
+                deferred=latency['deferred']
+            ),
+            inline=False
+        )
+
+    await command_guard.reply(interaction, embed=embed, ephemeral=True)
+
+PROFILED_EVENTS = ['on_voice_state_update', 'on_member_join']
+
+async def run_profiler(seconds: float) -> Dict:
+    """Profile the event handlers and background loops for a bounded window"""
+    print(f"Profiling handlers for {seconds} seconds")
+    report = await handler_profiler.profile(
+        bot,
+        seconds,
+        events=PROFILED_EVENTS,
+        loops={
+            'check_role_expiry': check_role_expiry,
+            'check_sticky_messages': check_sticky_messages,
+            'roll_voice_stats': roll_voice_stats,
+            'compact_join_history': compact_join_history
+        }
+    )
+    print(f"Profile written to {report['path']}.txt and {report['path']}.collapsed")
+    return report
+
+@debug.subcommand(name="profile", description="Profile event handlers and background loops for a number of seconds")
+@application_checks.has_permissions(administrator=True)
+async def debug_profile(
+    interaction: Interaction,
+    seconds: int = SlashOption(description="Duration of the profiling window", min_value=1, max_value=MAX_PROFILE_SECONDS)
+):
+    """Profile event handlers and background loops for a number of seconds"""
+    if handler_profiler.active:
+        await interaction.response.send_message(loc.get_text(interaction.guild_id, 'debug.profile_running'), ephemeral=True)
+        return
+
+    await interaction.response.send_message(loc.get_text(interaction.guild_id, 'debug.profile_started', seconds=seconds), ephemeral=True)
+    report = await run_profiler(seconds)
+
+    lines = []
+    for name, stats in sorted(report['handlers'].items(), key=lambda item: item[1]['wall'], reverse=True):
+        lines.append(loc.get_text(
+            interaction.guild_id,
+            'debug.profile_line',
+            name=name,
+            calls=stats['calls'],
+            wall=f"{stats['wall'] * 1000:.0f}",
+            cpu=f"{stats['cpu'] * 1000:.0f}",
+            rest=f"{stats['rest'] * 1000:.0f}"
+        ))
+    summary = '\n'.join(lines) or loc.get_text(interaction.guild_id, 'debug.profile_empty')
+    await interaction.followup.send(
+        loc.get_text(interaction.guild_id, 'debug.profile_done', path=report['path']) + f"\n```\n{summary[:1800]}```",
+        ephemeral=True
+    )
 
 # Update error handlers for slash commands
 @bot.event
 async def on_application_command_error(interaction: Interaction, error):
     """Global error handler for slash commands"""
-    if isinstance(error, commands.MissingPermissions):
-        await interaction.response.send_message(loc.get_text(interaction.guild_id, 'errors.missing_permissions'), ephemeral=True)
+    if isinstance(error, (commands.MissingPermissions, application_checks.ApplicationMissingPermissions)):
+        message = loc.get_text(interaction.guild_id, 'errors.missing_permissions')
     else:
         # Log other errors
         print(f"Error in slash command {interaction.application_command.name}: {error}")
-        await interaction.response.send_message("An error occurred while executing this command.", ephemeral=True)
+        message = "An error occurred while executing this command."
+
+    # The interaction may have expired while the command was running
+    if not command_guard.can_reply(interaction):
+        print(f"Interaction of {interaction.application_command.name} expired, the error could not be reported")
+        return
+    try:
+        await command_guard.reply(interaction, message, ephemeral=True)
+    except nextcord.HTTPException as e:
+        print(f"Could not report the error of {interaction.application_command.name}: {e}")
 
 @bot.event
 async def on_voice_state_update(member, before, after):
     """Gère la création et la suppression des salons vocaux"""
     guild_id = member.guild.id
+    if not graceful_shutdown.accepting:
+        return
     
-    if after.channel is not None and guild_id in guild_configs:
+    reused_channel = None
+    if after.channel is not None:
         # Vérifier si l'utilisateur a rejoint un salon créateur
-        if after.channel.id in guild_configs[guild_id]:
-            config = guild_configs[guild_id][after.channel.id]
-            
-            # Créer le nom du salon à partir du modèle
-            channel_name = config.template_name.replace("{user}", member.display_name)
-            
-            # Créer le nouveau salon dans la même catégorie que le créateur
-            new_channel = await member.guild.create_voice_channel(
-                name=channel_name,
-                category=after.channel.category,
-                user_limit=config.user_limit
-            )
+        config = get_guild_configs(guild_id).get(after.channel.id)
+        if config is not None:
 
-            # Positionner le salon relativement au créateur
-            try:
-                if config.position == "before":
-                    await new_channel.move(before=after.channel, sync_permissions=True)
-                else:  # after
-                    await new_channel.move(after=after.channel, sync_permissions=True)
-            except nextcord.HTTPException:
-                pass  # Ignorer les erreurs de position
-            
-            # Ajouter le nouveau salon à la liste des salons créés
-            if guild_id not in created_channels:
-                created_channels[guild_id] = set()
-            created_channels[guild_id].add(new_channel.id)
-            
-            # Déplacer le membre dans le nouveau salon
-            await member.move_to(new_channel)
-            print(f"Moved member {member.display_name} to {new_channel.name}")
+            # Renvoyer le membre dans son salon s'il en possède déjà un au lieu d'en créer un nouveau
+            reused_channel = find_owned_channel(member.guild, member.id)
+            if reused_channel:
+                with graceful_shutdown.track('voice'):
+                    await member.move_to(reused_channel)
+                voice_analytics.record_reused(guild_id)
+                print(f"Moved member {member.display_name} back to {reused_channel.name}")
+            elif creation_throttle.try_acquire(guild_id, member.id):
+                with warmup.voice_priority(), graceful_shutdown.track('voice'):
+                    await create_temp_channel(member, after.channel, config)
+            else:
+                voice_analytics.record_throttled(guild_id)
+                print(f"Throttled channel creation for {member.display_name}")
     
     # Nettoyer les salons vides
     if before.channel is not None and guild_id in created_channels:
         # Vérifier si le salon a été créé par le bot et est vide
         if (
             before.channel.id in created_channels[guild_id] and
+            before.channel != reused_channel and
             len(before.channel.members) == 0
         ):
-            await before.channel.delete()
-            created_channels[guild_id].remove(before.channel.id)
-            # Supprimer le set si c'était le dernier salon
-            if not created_channels[guild_id]:
-                del created_channels[guild_id]
-
-# Lancer le bot
-bot.run(os.getenv('DISCORD_TOKEN'))
+            with graceful_shutdown.track('voice'):
+                remember_channel_preferences(guild_id, before.channel)
+                await before.channel.delete()
+                untrack_channel(guild_id, before.channel.id)
+                await remove_empty_overflow_category(before.channel)
+
+def pending_slots(category: nextcord.CategoryChannel) -> int:
+    """Nombre de salons de la catégorie pas encore visibles dans le cache : en cours de création ou créés
+    mais en attente de leur CHANNEL_CREATE"""
+    uncached = sum(1 for channel_id in uncached_channels.get(category.id, ()) if category.guild.get_channel(channel_id) is None)
+    return reserved_slots.get(category.id, 0) + uncached
+
+def category_has_room(category: nextcord.CategoryChannel) -> bool:
+    """Vérifie dans le cache, sans appel API, qu'une catégorie peut accueillir un salon de plus"""
+    return len(category.channels) + pending_slots(category) < CATEGORY_CHANNEL_LIMIT
+
+async def reserve_category(guild: nextcord.Guild, creator: nextcord.VoiceChannel, config: VoiceCreatorConfig) -> Optional[nextcord.CategoryChannel]:
+    """Réserve une place dans la première catégorie non pleine, en créant une catégorie de débordement si besoin"""
+    base = creator.category
+    if base is None:
+        return None  # Hors catégorie, pas de limite de 50 salons
+
+    async with category_lock:
+        # La configuration a pu être déchargée et rechargée pendant l'attente du verrou
+        config = get_guild_configs(guild.id).get(creator.id, config)
+        candidates = [base] + [guild.get_channel(category_id) for category_id in config.overflow_categories]
+        category = next((c for c in candidates if c is not None and category_has_room(c)), None)
+
+        if category is None:
+            # Créer la catégorie de débordement juste après la dernière existante
+            last = next((c for c in reversed(candidates) if c is not None), base)
+            name = config.overflow_template.replace("{category}", base.name).replace("{n}", str(len(config.overflow_categories) + 2))
+            category = await guild.create_category(
+                name=name[:100],
+                overwrites=get_overwrites(base),
+                position=last.position + 1
+            )
+            config = get_guild_configs(guild.id).get(creator.id, config)
+            config.overflow_categories.append(category.id)
+            save_configs(guild.id)
+            print(f"Created overflow category {category.name} for creator {creator.id}")
+
+        reserved_slots[category.id] = reserved_slots.get(category.id, 0) + 1
+        return category
+
+def release_slot(category: Optional[nextcord.CategoryChannel]):
+    """Libère la place réservée une fois l'appel de création terminé, qu'il ait réussi ou échoué"""
+    if category is None:
+        return
+    reserved_slots[category.id] -= 1
+    if not reserved_slots[category.id]:
+        del reserved_slots[category.id]
+
+def forget_uncached_channel(channel: nextcord.abc.GuildChannel):
+    """Oublie un salon créé par le bot une fois qu'il est arrivé dans le cache (ou supprimé)"""
+    if channel.category_id is None or channel.category_id not in uncached_channels:
+        return
+    uncached_channels[channel.category_id].discard(channel.id)
+    if not uncached_channels[channel.category_id]:
+        del uncached_channels[channel.category_id]
+
+def find_overflow_owner(guild_id: int, category_id: int) -> Optional[VoiceCreatorConfig]:
+    """Retourne la configuration du créateur auquel appartient une catégorie de débordement"""
+    for config in get_guild_configs(guild_id).values():
+        if category_id in config.overflow_categories:
+            return config
+    return None
+
+async def remove_empty_overflow_category(channel: nextcord.abc.GuildChannel):
+    """Supprime la catégorie de débordement d'un salon supprimé si elle est désormais vide"""
+    category = channel.category
+    if category is None or pending_slots(category):
+        return
+
+    config = find_overflow_owner(channel.guild.id, category.id)
+    if config is None or any(c.id != channel.id for c in category.channels):
+        return
+
+    config.overflow_categories.remove(category.id)
+    save_configs(channel.guild.id)
+    try:
+        await category.delete()
+        print(f"Removed empty overflow category {category.name}")
+    except nextcord.NotFound:
+        pass
+
+def find_owned_channel(guild: nextcord.Guild, member_id: int) -> Optional[nextcord.VoiceChannel]:
+    """Retourne le salon temporaire encore existant dont le membre est propriétaire"""
+    for channel_id, owner_id in channel_owners.get(guild.id, {}).items():
+        if owner_id == member_id:
+            channel = guild.get_channel(channel_id)
+            if channel:
+                return channel
+    return None
+
+async def create_temp_channel(member: nextcord.Member, creator: nextcord.VoiceChannel, config: VoiceCreatorConfig):
+    """Crée un salon temporaire pour le membre et l'y déplace"""
+    guild_id = member.guild.id
+    # Créer le nom du salon à partir du modèle, en filtrant le nom du membre selon la politique du serveur
+    name_policy = server_config.get_name_policy(guild_id)
+    default_name = name_policy.channel_name(config.template_name, member.display_name, member.name)
+
+    # Reprendre les réglages que le membre avait changés dans son dernier salon, dès l'appel de création
+    prefs = channel_preferences.get(guild_id, creator.id, member.id)
+    options = {'user_limit': prefs.get('user_limit', config.user_limit)}
+    if 'bitrate' in prefs:
+        options['bitrate'] = min(prefs['bitrate'], int(member.guild.bitrate_limit))
+    channel_name = name_policy.sanitize(prefs['name'])[:CHANNEL_NAME_LIMIT] if 'name' in prefs else ''
+
+    # Choisir la première catégorie avec de la place (la catégorie du créateur, puis les débordements)
+    category = await reserve_category(member.guild, creator, config)
+    try:
+        # Reprendre les permissions de la catégorie et donner l'accès au propriétaire dès la création
+        # Lues depuis les données brutes : les membres absents du cache (non chargés au démarrage) sont gardés
+        overwrites = {target: overwrite for target, overwrite in get_overwrites(category).items() if target.id != member.id} if category else {}
+        owner_overwrite = get_member_overwrite(category, member.id) if category else nextcord.PermissionOverwrite()
+        overwrites[member] = nextcord.PermissionOverwrite.from_pair(*owner_overwrite.pair())
+        overwrites[member].update(view_channel=True, connect=True)
+
+        new_channel = await member.guild.create_voice_channel(
+            name=channel_name or default_name,
+            category=category,
+            overwrites=overwrites,
+            **options
+        )
+        # La réponse de l'API arrive avant le CHANNEL_CREATE : tant qu'il n'est pas reçu, la place reste
+        # comptée si le salon n'est pas (ou plus) dans le cache
+        if category is not None:
+            uncached_channels.setdefault(category.id, set()).add(new_channel.id)
+    finally:
+        release_slot(category)
+
+    # Positionner le salon relativement au créateur s'il est dans la même catégorie
+    if category == creator.category:
+        try:
+            if config.position == "before":
+                await new_channel.move(before=creator)
+            else:  # after
+                await new_channel.move(after=creator)
+        except nextcord.HTTPException:
+            pass  # Ignorer les erreurs de position
+
+    # Ajouter le nouveau salon à la liste des salons créés
+    if guild_id not in created_channels:
+        created_channels[guild_id] = set()
+    created_channels[guild_id].add(new_channel.id)
+    channel_owners.setdefault(guild_id, {})[new_channel.id] = member.id
+    channel_origins.setdefault(guild_id, {})[new_channel.id] = (creator.id, default_name)
+    event_recorder.record_created(guild_id, new_channel.id, member.id)
+    voice_analytics.record_created(guild_id, new_channel.id)
+
+    # Déplacer le membre dans le nouveau salon
+    await member.move_to(new_channel)
+    print(f"Moved member {member.display_name} to {new_channel.name}")
+
+def untrack_channel(guild_id: int, channel_id: int) -> bool:
+    """Oublie un salon temporaire supprimé. Retourne True si le salon était suivi."""
+    if channel_id not in created_channels.get(guild_id, set()):
+        return False
+
+    created_channels[guild_id].remove(channel_id)
+    channel_owners.get(guild_id, {}).pop(channel_id, None)
+    channel_origins.get(guild_id, {}).pop(channel_id, None)
+    edit_coalescer.discard(channel_id)
+    voice_analytics.record_deleted(guild_id, channel_id)
+    # Supprimer le set si c'était le dernier salon
+    if not created_channels[guild_id]:
+        del created_channels[guild_id]
+        channel_owners.pop(guild_id, None)
+        channel_origins.pop(guild_id, None)
+    return True
+
+def remember_channel_preferences(guild_id: int, channel: nextcord.VoiceChannel):
+    """Retient les réglages que le propriétaire a changés dans son salon, pour son prochain salon du même créateur"""
+    origin = channel_origins.get(guild_id, {}).get(channel.id)
+    owner_id = channel_owners.get(guild_id, {}).get(channel.id)
+    if origin is None or owner_id is None:
+        return
+    creator_id, default_name = origin
+    config = get_guild_configs(guild_id).get(creator_id)
+    if config is None:
+        return  # Créateur supprimé entre-temps
+
+    # Les modifications encore regroupées n'ont pas encore été appliquées au salon
+    settings = {'name': channel.name, 'user_limit': channel.user_limit, 'bitrate': channel.bitrate}
+    settings.update(edit_coalescer.get_pending_options(channel.id))
+    channel_preferences.capture(
+        guild_id,
+        creator_id,
+        owner_id,
+        name=settings['name'] if settings['name'] != default_name else None,
+        user_limit=settings['user_limit'] if settings['user_limit'] != config.user_limit else None,
+        bitrate=settings['bitrate'] if settings['bitrate'] != DEFAULT_BITRATE else None
+    )
+
+def evict_missing_creators(guild_id: int):
+    """Oublie les créateurs et catégories de débordement d'un serveur chargé qui n'existent plus"""
+    guild = bot.get_guild(guild_id)
+    configs = guild_configs.get(guild_id)
+    if guild is None or guild.unavailable or not configs:
+        return  # Cache du serveur pas encore reçu, vérifié à son on_guild_available
+
+    changed = False
+    for creator_id in [creator_id for creator_id in configs if guild.get_channel(creator_id) is None]:
+        del configs[creator_id]
+        channel_preferences.forget_creator(guild_id, creator_id)
+        changed = True
+        print(f"Creator {creator_id} removed for guild {guild_id}: the channel no longer exists")
+    for config in configs.values():
+        missing = [category_id for category_id in config.overflow_categories if guild.get_channel(category_id) is None]
+        for category_id in missing:
+            config.overflow_categories.remove(category_id)
+        changed = changed or bool(missing)
+
+    if changed:
+        save_configs(guild_id)
+        invalidate_creator_list(guild_id)
+
+def evict_missing_channels(guild: nextcord.Guild):
+    """Évince l'état déjà chargé d'un serveur qui vise des salons supprimés pendant que le bot était hors ligne
+
+    Seules les données en mémoire sont vérifiées : les fichiers des autres serveurs le sont à leur chargement.
+    """
+    if guild.unavailable:
+        return
+    if guild.id in voice_shards.loaded:
+        evict_missing_creators(guild.id)
+
+    stale = [channel_id for channel_id in server_config.sticky_messages.get(guild.id, {}) if guild.get_channel(channel_id) is None]
+    removed = [channel_id for channel_id in stale if server_config.forget_channel(guild.id, channel_id)]
+    if removed:
+        server_config.save_config()
+        print(f"Sticky messages removed for guild {guild.id}: channels {removed} no longer exist")
+
+@bot.event
+async def on_guild_available(guild):
+    """Check the loaded state of a guild against its channels once its cache is received"""
+    evict_missing_channels(guild)
+
+@bot.event
+async def on_guild_channel_create(channel):
+    """Release the slot counted for a temporary channel now that it is in the cache"""
+    forget_uncached_channel(channel)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    """Evict all state tied to a deleted channel"""
+    guild_id = channel.guild.id
+    untrack_channel(guild_id, channel.id)
+    forget_uncached_channel(channel)
+
+    configs = get_guild_configs(guild_id)
+    if channel.id in configs:
+        del configs[channel.id]
+        channel_preferences.forget_creator(guild_id, channel.id)
+        save_configs(guild_id)
+        invalidate_creator_list(guild_id)
+    elif isinstance(channel, nextcord.CategoryChannel):
+        # Catégorie de débordement supprimée à la main
+        config = find_overflow_owner(guild_id, channel.id)
+        if config is not None:
+            config.overflow_categories.remove(channel.id)
+            save_configs(guild_id)
+    else:
+        await remove_empty_overflow_category(channel)
+
+    if server_config.forget_channel(guild_id, channel.id):
+        server_config.save_config()
+
+@bot.event
+async def on_guild_role_delete(role):
+    """Evict the autorole configuration using a deleted role"""
+    if server_config.forget_role(role.guild.id, role.id):
+        server_config.save_config()
+        print(f"Autorole rule removed for guild {role.guild.id}: role {role.name} was deleted")
+
+@bot.event
+async def on_guild_remove(guild):
+    """Evict all state of a guild the bot was removed from"""
+    for channel_id in list(created_channels.get(guild.id, set())):
+        untrack_channel(guild.id, channel_id)
+    voice_analytics.guilds.pop(guild.id, None)
+    invalidate_creator_list(guild.id)
+    loc.guild_languages.pop(guild.id, None)
+
+    voice_shards.delete(guild.id)
+    channel_preferences.forget_guild(guild.id)
+    if server_config.forget_guild(guild.id):
+        server_config.save_config()
+    print(f"Removed from guild {guild.name}, state evicted")
+
+async def shutdown(signal_name: str):
+    """Arrêt propre : arrête les entrées, attend les actions en cours jusqu'au délai puis sauvegarde tout l'état"""
+    if not graceful_shutdown.begin():
+        return
+    print(f"Received {signal_name}, shutting down (deadline {graceful_shutdown.deadline:.0f}s)")
+
+    # Plus de nouvelles actions : les handlers ignorent les événements et les tâches s'arrêtent après leur tour en cours
+    warmup.stop()
+    for task in (check_role_expiry, check_sticky_messages, roll_voice_stats, compact_join_history, flush_shards):
+        task.stop()
+
+    remaining = await graceful_shutdown.drain()
+    if remaining:
+        print(f"Shutdown deadline reached with actions still in flight: {remaining}")
+
+    # Appliquer les modifications de salons encore regroupées
+    try:
+        await asyncio.wait_for(edit_coalescer.flush_all(), max(1.0, graceful_shutdown.remaining()))
+    except asyncio.TimeoutError:
+        print(f"Dropped pending channel edits for {len(edit_coalescer.pending)} channels")
+
+    server_config.save_config()
+    voice_shards.flush()
+    channel_preferences.save()
+    voice_analytics.save_stats()
+    event_recorder.close()
+    print("State saved, closing the connection")
+    await bot.close()
+
+def record_guild_snapshot(guild: nextcord.Guild):
+    """Écrit la configuration du serveur dans l'enregistrement avant son premier événement"""
+    if event_recorder.has_guild(guild.id):
+        return
+    creators = []
+    for creator_id, config in get_guild_configs(guild.id).items():
+        creator = guild.get_channel(creator_id)
+        creators.append(dict(config.to_dict(), category_id=creator.category_id if creator else None))
+    rules = server_config.get_autorole_rules(guild.id)  # charge aussi le fichier du serveur
+    event_recorder.record_guild(
+        guild.id,
+        guild.premium_tier,
+        creators,
+        rules,
+        list(server_config.sticky_messages.get(guild.id, {})),
+        server_config.get_name_policy(guild.id).max_length
+    )
+
+async def record_voice_state(member, before, after):
+    """Enregistre les changements de salon vocal, sauf ceux faits par le bot lui-même"""
+    if member.id == bot.user.id or before.channel == after.channel:
+        return  # Micro ou casque coupé, sans changement de salon
+    guild_id = member.guild.id
+    if (
+        before.channel is not None and after.channel is not None and
+        before.channel.id in get_guild_configs(guild_id) and
+        after.channel.id in created_channels.get(guild_id, ())
+    ):
+        return  # Déplacement vers un salon temporaire, la relecture le refait elle-même
+    record_guild_snapshot(member.guild)
+    event_recorder.record_voice(guild_id, member.id, after.channel.id if after.channel else None)
+
+async def record_member_join(member):
+    """Enregistre l'arrivée d'un membre, pour les rôles automatiques"""
+    record_guild_snapshot(member.guild)
+    event_recorder.record_join(member.guild.id, member.id, member.bot)
+
+async def record_message(message):
+    """Enregistre les messages des salons à message épinglé, les seuls que le bot surveille"""
+    if message.guild is None or message.author.id == bot.user.id:
+        return
+    if server_config.get_sticky_message(message.guild.id, message.channel.id) is None:
+        return
+    record_guild_snapshot(message.guild)
+    event_recorder.record_message(message.guild.id, message.channel.id, message.author.id)
+
+# Lancer le bot (replay.py importe ce module sans le lancer)
+if __name__ == '__main__':
+    bot.run(os.getenv('DISCORD_TOKEN'))
@@ -0,0 +1,116 @@
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CHANNEL_NAME_LIMIT = 100  # Discord's limit for channel names
+MAX_COMBINING_MARKS = 2  # stacked accents kept per character, more is "zalgo" text
+
+# Look-alike characters folded onto the letter they imitate
+LEET = str.maketrans('013457@$', 'oieastas')
+
+
+def clean_name(text: str) -> str:
+    """Normalize a display name: compatibility forms, no control or invisible characters, single spaces"""
+    text = unicodedata.normalize('NFKC', text)
+    chars = []
+    marks = 0
+    for char in text:
+        category = unicodedata.category(char)
+        if category[0] == 'C':
+            continue  # control, format (zero-width), private use and unassigned characters
+        marks = marks + 1 if category == 'Mn' else 0
+        if marks <= MAX_COMBINING_MARKS:
+            chars.append(char)
+    return ' '.join(''.join(chars).split())
+
+
+def _fold_char(char: str) -> str:
+    base = unicodedata.normalize('NFKD', char)[:1] or char
+    return (base.lower()[:1] or base).translate(LEET)
+
+
+def fold(text: str) -> str:
+    """Fold case, accents and look-alikes for matching, one character for one so positions are kept"""
+    return ''.join(_fold_char(char) for char in text)
+
+
+class TermMatcher:
+    """Aho-Corasick automaton over a list of terms, built once and matched in a single pass"""
+
+    def __init__(self, terms: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.longest: List[int] = [0]  # length of the longest term ending at each state, 0 if none
+
+        for term in terms:
+            state = 0
+            for char in term:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = self.goto[state][char] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.longest.append(0)
+                state = next_state
+            self.longest[state] = max(self.longest[state], len(term))
+
+        # Breadth-first so the failure state of a node is always finished before it
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.longest[next_state] = max(self.longest[next_state], self.longest[self.fail[next_state]])
+                queue.append(next_state)
+
+    def find(self, text: str) -> List[Tuple[int, int]]:
+        """Get the (start, end) spans of the terms found in a text"""
+        spans = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.longest[state]:
+                spans.append((i + 1 - self.longest[state], i + 1))
+        return spans
+
+
+class NamePolicy:
+    """The channel name policy of a guild: banned terms are masked and names fit the length limits"""
+
+    def __init__(self, terms: Iterable[str] = (), max_length: Optional[int] = None):
+        self.terms = tuple(terms)  # as configured, to tell whether the matcher must be rebuilt
+        folded = {fold(clean_name(term)) for term in self.terms}
+        folded.discard('')
+        self.matcher = TermMatcher(folded) if folded else None
+        self.max_length = max_length
+
+    def sanitize(self, display_name: str) -> str:
+        """Clean a display name and mask the banned terms it contains"""
+        name = clean_name(display_name)
+        if self.matcher is None:
+            return name
+
+        spans = self.matcher.find(fold(name))
+        if not spans:
+            return name
+        chars = list(name)
+        for start, end in spans:
+            chars[start:end] = '*' * (end - start)
+        return ''.join(chars)
+
+    def channel_name(self, template: str, display_name: str, fallback: str) -> str:
+        """Build a channel name from a template, the fallback is used when nothing is left of the display name"""
+        name = self.sanitize(display_name) or self.sanitize(fallback) or 'user'
+        count = template.count('{user}')
+        if count:
+            # Cut the name rather than the template so the result stays within Discord's limit
+            budget = (CHANNEL_NAME_LIMIT - len(template) + len('{user}') * count) // count
+            if self.max_length:
+                budget = min(budget, self.max_length)
+            name = name[:max(1, budget)].rstrip()
+        return template.replace('{user}', name)[:CHANNEL_NAME_LIMIT]
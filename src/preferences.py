@@ -0,0 +1,83 @@
+from typing import Dict, List, Optional, Tuple
+
+from shards import ShardStore
+
+PREFS_DIR = 'channel_prefs'  # one shard per guild
+DEFAULT_BITRATE = 64000  # bitrate of a new voice channel when none is given
+
+# Stored as [name, user_limit, bitrate], None where the member kept the creator's default
+PREF_FIELDS = ('name', 'user_limit', 'bitrate')
+
+
+class ChannelPreferences:
+    """The temp channel settings each member changed last time, per creator
+
+    Only the settings that differ from the creator's defaults are kept. The shards
+    of the guilds in use stay in memory, so a creation reads its preferences
+    without touching the disk.
+    """
+
+    def __init__(self):
+        self.prefs: Dict[int, Dict[Tuple[int, int], List]] = {}  # guild_id -> (creator_id, member_id) -> values
+        self.store = ShardStore(PREFS_DIR, self._load_guild, self._dump_guild, self._drop_guild)
+
+    def _load_guild(self, guild_id: int, data: Dict):
+        self.prefs[guild_id] = {
+            (int(creator_id), int(member_id)): values
+            for creator_id, members in data.items()
+            for member_id, values in members.items()
+        }
+
+    def _dump_guild(self, guild_id: int) -> Dict:
+        data = {}
+        for (creator_id, member_id), values in self.prefs.get(guild_id, {}).items():
+            data.setdefault(str(creator_id), {})[str(member_id)] = values
+        return data
+
+    def _drop_guild(self, guild_id: int):
+        self.prefs.pop(guild_id, None)
+
+    def get(self, guild_id: int, creator_id: int, member_id: int) -> Dict:
+        """Get the settings a member changed in their last channel of a creator"""
+        self.store.touch(guild_id)
+        values = self.prefs[guild_id].get((creator_id, member_id))
+        if not values:
+            return {}
+        return {field: value for field, value in zip(PREF_FIELDS, values) if value is not None}
+
+    def capture(self, guild_id: int, creator_id: int, member_id: int, name: Optional[str] = None,
+                user_limit: Optional[int] = None, bitrate: Optional[int] = None):
+        """Remember the settings of a member's channel, None for the ones left to the creator's default"""
+        self.store.touch(guild_id)
+        key = (creator_id, member_id)
+        values = [name, user_limit, bitrate]
+        if values == self.prefs[guild_id].get(key, [None, None, None]):
+            return
+
+        if any(value is not None for value in values):
+            self.prefs[guild_id][key] = values
+        else:
+            del self.prefs[guild_id][key]
+        self.store.mark_dirty(guild_id)
+
+    def forget_creator(self, guild_id: int, creator_id: int):
+        """Drop the preferences tied to a removed creator"""
+        self.store.touch(guild_id)
+        members = self.prefs[guild_id]
+        keys = [key for key in members if key[0] == creator_id]
+        for key in keys:
+            del members[key]
+        if keys:
+            self.store.mark_dirty(guild_id)
+
+    def forget_guild(self, guild_id: int):
+        """Drop the preferences of a guild along with its shard file"""
+        self.store.delete(guild_id)
+
+    def save(self):
+        """Write the modified guilds back to their shard files"""
+        self.store.flush()
+
+    def evict_idle(self) -> List[int]:
+        """Unload the guilds that have not been used for a while. Returns their ids."""
+        return self.store.evict()
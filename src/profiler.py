@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+PROFILE_DIR = 'profiles'
+SAMPLE_INTERVAL = 0.005  # seconds between two stack samples
+MAX_PROFILE_SECONDS = 600
+
+# Name of the profiled handler the current task is running, used to attribute REST calls
+_current_handler: ContextVar[Optional[str]] = ContextVar('profiled_handler', default=None)
+
+
+class HandlerProfiler:
+    """Wraps event handlers and loop bodies for a bounded window while profiling
+
+    Nothing is wrapped outside of a profiling window, so it costs nothing when disabled.
+    Each handler's wall time is split between local CPU (time spent running its steps),
+    REST calls (time spent awaiting the HTTP client) and other waiting.
+    """
+
+    def __init__(self, output_dir: str = PROFILE_DIR, sample_interval: float = SAMPLE_INTERVAL):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.active = False
+        self.stats: Dict[str, Dict] = {}  # handler -> {'calls', 'wall', 'cpu', 'rest', 'rest_calls'}
+        self.stacks: Counter = Counter()  # collapsed stack -> samples
+        self._running: Optional[str] = None  # handler whose step is executing on the loop thread
+        self._loop_thread_id: Optional[int] = None
+
+    async def profile(self, bot, seconds: float, events: Iterable[str], loops: Dict[str, object]) -> Dict:
+        """Profile the given bot events and tasks.loop objects for a number of seconds
+
+        Returns:
+            Dict: The per-handler statistics and the path prefix of the written files
+        """
+        if self.active:
+            raise RuntimeError("A profiling session is already running")
+        self.active = True
+        self.stats = {}
+        self.stacks = Counter()
+        self._loop_thread_id = threading.get_ident()
+
+        originals = {}
+        for event in events:
+            originals[event] = getattr(bot, event)
+            setattr(bot, event, self._wrap(event, originals[event]))
+        for name, loop in loops.items():
+            originals[name] = loop.coro
+            loop.coro = self._wrap(name, loop.coro)
+        bot.http.request = self._wrap_request(bot.http.request)
+
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(stop,), name='handler-profiler', daemon=True)
+        sampler.start()
+        try:
+            await asyncio.sleep(min(seconds, MAX_PROFILE_SECONDS))
+        finally:
+            stop.set()
+            del bot.http.request
+            for event in events:
+                setattr(bot, event, originals[event])
+            for name, loop in loops.items():
+                loop.coro = originals[name]
+            self.active = False
+
+        path = await asyncio.to_thread(self._write_results)
+        return {'path': path, 'handlers': self.stats}
+
+    def _get_stats(self, name: str) -> Dict:
+        if name not in self.stats:
+            self.stats[name] = {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'rest': 0.0, 'rest_calls': 0}
+        return self.stats[name]
+
+    def _wrap(self, name: str, func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            stats = self._get_stats(name)
+            token = _current_handler.set(name)
+            started = time.perf_counter()
+            try:
+                return await _TimedCoroutine(self, name, func(*args, **kwargs))
+            finally:
+                stats['calls'] += 1
+                stats['wall'] += time.perf_counter() - started
+                _current_handler.reset(token)
+        return wrapper
+
+    def _wrap_request(self, request: Callable) -> Callable:
+        @functools.wraps(request)
+        async def wrapper(*args, **kwargs):
+            name = _current_handler.get()
+            if name is None:
+                return await request(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return await request(*args, **kwargs)
+            finally:
+                stats = self._get_stats(name)
+                stats['rest_calls'] += 1
+                stats['rest'] += time.perf_counter() - started
+        return wrapper
+
+    def _sample(self, stop: threading.Event):
+        """Runs in a separate thread and samples the loop thread's stack while a handler step runs"""
+        while not stop.wait(self.sample_interval):
+            handler = self._running
+            if handler is None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            names = []
+            while frame is not None and frame.f_code is not _step_code:
+                names.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            names.append(handler)
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def _write_results(self) -> str:
+        """Write the collapsed stacks (flamegraph format) and a wall time summary"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+
+        with open(f"{path}.collapsed", 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        with open(f"{path}.txt", 'w', encoding='utf-8') as f:
+            f.write(f"{'handler':<28}{'calls':>8}{'wall ms':>12}{'cpu ms':>12}{'rest ms':>12}{'rest calls':>12}{'other ms':>12}\n")
+            for name, stats in sorted(self.stats.items(), key=lambda item: item[1]['wall'], reverse=True):
+                other = max(0.0, stats['wall'] - stats['cpu'] - stats['rest'])
+                f.write(
+                    f"{name:<28}{stats['calls']:>8}{stats['wall'] * 1000:>12.1f}{stats['cpu'] * 1000:>12.1f}"
+                    f"{stats['rest'] * 1000:>12.1f}{stats['rest_calls']:>12}{other * 1000:>12.1f}\n"
+                )
+        return path
+
+
+class _TimedCoroutine:
+    """Awaitable driving a coroutine step by step to measure the CPU time of its steps"""
+
+    def __init__(self, profiler: HandlerProfiler, name: str, coro):
+        self.profiler = profiler
+        self.name = name
+        self.coro = coro
+
+    def __await__(self):
+        return _step(self.profiler, self.name, self.coro)
+
+
+def _step(profiler: HandlerProfiler, name: str, coro):
+    stats = profiler._get_stats(name)
+    value, error = None, None
+    while True:
+        profiler._running = name
+        started = time.perf_counter()
+        try:
+            yielded = coro.throw(error) if error is not None else coro.send(value)
+        except StopIteration as e:
+            return e.value
+        finally:
+            stats['cpu'] += time.perf_counter() - started
+            profiler._running = None
+
+        try:
+            value, error = (yield yielded), None
+        except BaseException as e:
+            value, error = None, e
+
+
+_step_code = _step.__code__
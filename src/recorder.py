@@ -0,0 +1,131 @@
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+RECORD_DIR = 'recordings'
+RECORD_VERSION = 1
+DISCORD_EPOCH = 1420070400000  # milliseconds, start of Discord snowflake timestamps
+DAY_MS = 86400000
+SEQUENCE_BITS = 22  # low bits of a snowflake, below the timestamp
+
+# Kinds of recorded lines, each one a JSON array starting with the milliseconds since the recording started:
+#   [t, 'h', version]                            header
+#   [t, 'g', guild, snapshot]                    creators, autorole rules and sticky channels of a guild, before its first event
+#   [t, 'v', guild, member, channel]             a member joined, moved to or left (channel null) a voice channel
+#   [t, 'j', guild, member, bot]                 a member joined the guild
+#   [t, 'm', guild, channel, author]             a message was posted in a sticky message channel
+#   [t, 'c', guild, channel, owner]              the bot created a temporary channel
+KINDS = ('h', 'g', 'v', 'j', 'm', 'c')
+
+
+class EventRecorder:
+    """Records the gateway events the handlers consume to a line-delimited file, for replay.py
+
+    Ids are replaced by made-up snowflakes that only keep the day the original object was
+    created, so account ages still work in a replay. The mapping only lives in memory and
+    message contents, names and sticky texts are never written.
+    """
+
+    def __init__(self, output_dir: str = RECORD_DIR):
+        self.output_dir = output_dir
+        self.path: Optional[str] = None
+        self.active = False
+        self.ids: Dict[int, int] = {}  # real id -> anonymized id
+        self.guilds: Set[int] = set()  # guilds whose snapshot was written
+        self._sequence = 0
+        self._file = None
+        self._started = time.monotonic()
+
+    def start(self) -> str:
+        """Start recording to a new file, one per run so the anonymized ids stay consistent within a file"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.path = os.path.join(self.output_dir, f"recording-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl")
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._started = time.monotonic()
+        self.active = True
+        self._write('h', RECORD_VERSION)
+        return self.path
+
+    def anon(self, snowflake: Optional[int]) -> Optional[int]:
+        """Get the anonymized id of a snowflake, the same one for the whole recording"""
+        if snowflake is None:
+            return None
+        anonymized = self.ids.get(snowflake)
+        if anonymized is None:
+            created_ms = (snowflake >> SEQUENCE_BITS) + DISCORD_EPOCH
+            day = (created_ms // DAY_MS) * DAY_MS - DISCORD_EPOCH
+            self._sequence = (self._sequence + 1) % (1 << SEQUENCE_BITS)
+            anonymized = self.ids[snowflake] = (max(day, 0) << SEQUENCE_BITS) | self._sequence
+        return anonymized
+
+    def _write(self, kind: str, *values):
+        elapsed = int((time.monotonic() - self._started) * 1000)
+        self._file.write(json.dumps([elapsed, kind, *values], separators=(',', ':')) + '\n')
+
+    def has_guild(self, guild_id: int) -> bool:
+        return guild_id in self.guilds
+
+    def record_guild(self, guild_id: int, premium_tier: int, creators: Iterable[Dict], rules: List[Dict],
+                     sticky_channels: Iterable[int], name_max_length: Optional[int] = None):
+        """Write the configuration a replay needs for a guild
+
+        Args:
+            creators: The creator configurations (VoiceCreatorConfig.to_dict) with their 'category_id'
+        """
+        self.guilds.add(guild_id)
+        snapshot = {
+            'premium_tier': premium_tier,
+            'creators': [
+                dict(
+                    creator,
+                    channel_id=self.anon(creator['channel_id']),
+                    category_id=self.anon(creator.get('category_id')),
+                    overflow_categories=[self.anon(category_id) for category_id in creator.get('overflow_categories', [])]
+                )
+                for creator in creators
+            ],
+            'autorole': [dict(rule, role_id=self.anon(rule['role_id'])) for rule in rules],
+            'sticky': [self.anon(channel_id) for channel_id in sticky_channels],
+            'name_max_length': name_max_length
+        }
+        self._write('g', self.anon(guild_id), snapshot)
+
+    def record_voice(self, guild_id: int, member_id: int, channel_id: Optional[int]):
+        self._write('v', self.anon(guild_id), self.anon(member_id), self.anon(channel_id))
+
+    def record_join(self, guild_id: int, member_id: int, bot: bool):
+        self._write('j', self.anon(guild_id), self.anon(member_id), int(bot))
+
+    def record_message(self, guild_id: int, channel_id: int, author_id: int):
+        self._write('m', self.anon(guild_id), self.anon(channel_id), self.anon(author_id))
+
+    def record_created(self, guild_id: int, channel_id: int, owner_id: int):
+        """Record a temporary channel so a replay can match later events to the channel it creates itself"""
+        if self.active:
+            self._write('c', self.anon(guild_id), self.anon(channel_id), self.anon(owner_id))
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            self.active = False
+
+
+def read_recording(path: str) -> List[List]:
+    """Read a recording, skipping the header and any line cut short by a crash"""
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if len(event) >= 2 and event[1] in KINDS and event[1] != 'h':
+                events.append(event)
+    return events
@@ -0,0 +1,471 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+import nextcord
+from nextcord.utils import time_snowflake, utcnow
+
+import main  # the bot is only started when main.py is run itself
+from recorder import read_recording
+
+API_LATENCY = 0.05  # seconds taken by each stand-in REST call
+SETTLE_SECONDS = 5.0  # wait after the last event for the handlers and coalesced edits to finish
+STICKY_CONTENT = 'Sticky message'  # recordings do not keep the real text
+
+TEXT_CHANNEL, VOICE_CHANNEL, CATEGORY_CHANNEL = 0, 2, 4
+
+
+def _route_pattern(path: str) -> re.Pattern:
+    return re.compile(re.sub(r'\\{(\w+)\\}', r'(?P<\1>[^/]+)', re.escape(path)) + '$')
+
+
+def _member_payload(member_id: int, bot: bool = False, roles: Optional[List[int]] = None) -> Dict:
+    return {
+        'user': {'id': str(member_id), 'username': f"member-{member_id}", 'discriminator': '0', 'avatar': None, 'bot': bot},
+        'roles': [str(role_id) for role_id in roles or []],
+        'joined_at': utcnow().isoformat(),
+        'deaf': False,
+        'mute': False
+    }
+
+
+class FakeDiscord:
+    """Stand-in for Discord's REST API, answering the calls the handlers make from plain payloads
+
+    Every call waits for a fixed latency, then the gateway events Discord would send back
+    (channel created, member moved...) go through the client's own parsers, so the cache
+    the handlers read stays coherent.
+    """
+
+    def __init__(self, state, latency: float = API_LATENCY):
+        self.state = state
+        self.latency = latency
+        self.calls: Counter = Counter()  # 'METHOD /path' -> calls
+        self.unhandled: Counter = Counter()
+        self.channels: Dict[int, Dict] = {}  # channel_id -> payload
+        self.members: Dict[Tuple[int, int], Dict] = {}  # (guild_id, member_id) -> payload
+        self.voice: Dict[Tuple[int, int], Optional[int]] = {}  # (guild_id, member_id) -> channel_id
+        self.messages: Dict[int, List[Dict]] = defaultdict(list)  # channel_id -> payloads, oldest first
+        self._last_id = 0
+        self._routes: List[Tuple[str, re.Pattern, Callable]] = [
+            (method, _route_pattern(path), handler)
+            for method, path, handler in [
+                ('POST', '/guilds/{guild_id}/channels', self.create_channel),
+                ('PATCH', '/guilds/{guild_id}/channels', self.ignore),
+                ('PATCH', '/channels/{channel_id}', self.edit_channel),
+                ('DELETE', '/channels/{channel_id}', self.delete_channel),
+                ('PUT', '/channels/{channel_id}/permissions/{target_id}', self.ignore),
+                ('GET', '/guilds/{guild_id}/members/{user_id}', self.get_member),
+                ('PATCH', '/guilds/{guild_id}/members/{user_id}', self.edit_member),
+                ('PUT', '/guilds/{guild_id}/members/{user_id}/roles/{role_id}', self.add_role),
+                ('DELETE', '/guilds/{guild_id}/members/{user_id}/roles/{role_id}', self.remove_role),
+                ('GET', '/channels/{channel_id}/messages', self.get_messages),
+                ('POST', '/channels/{channel_id}/messages', self.send_message),
+                ('GET', '/channels/{channel_id}/messages/{message_id}', self.get_message),
+                ('DELETE', '/channels/{channel_id}/messages/{message_id}', self.delete_message),
+            ]
+        ]
+
+    def next_id(self) -> int:
+        self._last_id = max(self._last_id + 1, time_snowflake(utcnow()))
+        return self._last_id
+
+    async def request(self, route, *, files=None, form=None, **kwargs):
+        """Replaces HTTPClient.request"""
+        name = f"{route.method} {route.path}"
+        self.calls[name] += 1
+        await asyncio.sleep(self.latency)
+        path = route.url[len(route.BASE):]
+        for method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if method == route.method and match:
+                params = {key: int(value) for key, value in match.groupdict().items()}
+                return handler(params, kwargs.get('json') or {})
+        self.unhandled[name] += 1
+        return None
+
+    def _not_found(self, message: str):
+        raise nextcord.NotFound(SimpleNamespace(status=404, reason='Not Found'), {'code': 10000, 'message': message})
+
+    def ignore(self, params: Dict, body) -> None:
+        return None
+
+    # Gateway side
+
+    def add_guild(self, guild_id: int, snapshot: Dict, voice_channels: List[int], text_channels: List[int]):
+        """Send the GUILD_CREATE of a recorded guild, with the channels its events reference"""
+        bot_role = self.next_id()
+        roles = [
+            {'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0},
+            {'id': str(bot_role), 'name': 'bot', 'permissions': str(nextcord.Permissions.all().value), 'position': 100}
+        ]
+        roles += [
+            {'id': str(rule['role_id']), 'name': f"role-{rule['role_id']}", 'permissions': '0', 'position': 1}
+            for rule in snapshot.get('autorole', [])
+        ]
+
+        channels = {}
+        for creator in snapshot.get('creators', []):
+            for category_id in [creator.get('category_id')] + creator.get('overflow_categories', []):
+                if category_id:
+                    channels[category_id] = {'type': CATEGORY_CHANNEL, 'name': f"category-{category_id}"}
+            channels[creator['channel_id']] = {'type': VOICE_CHANNEL, 'parent_id': creator.get('category_id')}
+        for channel_id in voice_channels:
+            channels.setdefault(channel_id, {'type': VOICE_CHANNEL})
+        for channel_id in text_channels + snapshot.get('sticky', []):
+            channels.setdefault(channel_id, {'type': TEXT_CHANNEL})
+
+        for position, (channel_id, channel) in enumerate(channels.items()):
+            parent_id = channel.get('parent_id')
+            self.channels[channel_id] = {
+                'id': str(channel_id),
+                'guild_id': str(guild_id),
+                'type': channel['type'],
+                'name': channel.get('name', f"channel-{channel_id}"),
+                'position': position,
+                'parent_id': str(parent_id) if parent_id else None,
+                'permission_overwrites': []
+            }
+
+        me = _member_payload(self.state.self_id, bot=True, roles=[bot_role])
+        self.members[(guild_id, self.state.self_id)] = me
+        self.state._add_guild_from_data({
+            'id': str(guild_id),
+            'name': f"guild-{guild_id}",
+            'owner_id': str(self.state.self_id),
+            'premium_tier': snapshot.get('premium_tier', 0),
+            'roles': roles,
+            'channels': list(self.channels[channel_id] for channel_id in channels),
+            'members': [me],
+            'voice_states': [],
+            'features': [],
+            'emojis': [],
+            'stickers': [],
+            'threads': [],
+            'member_count': 1
+        })
+
+    def member(self, guild_id: int, member_id: int, bot: bool = False) -> Dict:
+        payload = self.members.get((guild_id, member_id))
+        if payload is None:
+            payload = self.members[(guild_id, member_id)] = _member_payload(member_id, bot)
+        return payload
+
+    def member_join(self, guild_id: int, member_id: int, bot: bool):
+        self.state.parsers['GUILD_MEMBER_ADD'](dict(self.member(guild_id, member_id, bot), guild_id=str(guild_id)))
+
+    def voice_state(self, guild_id: int, member_id: int, channel_id: Optional[int]):
+        self.voice[(guild_id, member_id)] = channel_id
+        self.state.parsers['VOICE_STATE_UPDATE']({
+            'guild_id': str(guild_id),
+            'channel_id': str(channel_id) if channel_id else None,
+            'user_id': str(member_id),
+            'member': self.member(guild_id, member_id),
+            'session_id': 'replay',
+            'deaf': False,
+            'mute': False,
+            'self_deaf': False,
+            'self_mute': False,
+            'self_video': False,
+            'suppress': False,
+            'request_to_speak_timestamp': None
+        })
+
+    def message(self, guild_id: int, channel_id: int, author_id: int) -> Dict:
+        author = self.member(guild_id, author_id, bot=author_id == self.state.self_id)
+        payload = {
+            'id': str(self.next_id()),
+            'channel_id': str(channel_id),
+            'guild_id': str(guild_id),
+            'author': author['user'],
+            'member': {key: value for key, value in author.items() if key != 'user'},
+            'content': '',
+            'timestamp': utcnow().isoformat(),
+            'edited_timestamp': None,
+            'tts': False,
+            'mention_everyone': False,
+            'mentions': [],
+            'mention_roles': [],
+            'attachments': [],
+            'embeds': [],
+            'pinned': False,
+            'type': 0
+        }
+        self.messages[channel_id].append(payload)
+        del self.messages[channel_id][:-50]
+        self.state.parsers['MESSAGE_CREATE'](payload)
+        return payload
+
+    # REST side
+
+    def create_channel(self, params: Dict, body: Dict) -> Dict:
+        payload = {key: value for key, value in body.items() if value is not None}
+        payload.update(id=str(self.next_id()), guild_id=str(params['guild_id']))
+        payload.setdefault('permission_overwrites', [])
+        payload.setdefault('position', len(self.channels))
+        self.channels[int(payload['id'])] = payload
+        self.state.parsers['CHANNEL_CREATE'](payload)
+        return payload
+
+    def edit_channel(self, params: Dict, body: Dict) -> Dict:
+        payload = self.channels.get(params['channel_id'])
+        if payload is None:
+            self._not_found('Unknown Channel')
+        payload.update(body)
+        self.state.parsers['CHANNEL_UPDATE'](payload)
+        return payload
+
+    def delete_channel(self, params: Dict, body: Dict) -> Dict:
+        payload = self.channels.pop(params['channel_id'], None)
+        if payload is None:
+            self._not_found('Unknown Channel')
+        self.messages.pop(params['channel_id'], None)
+        self.state.parsers['CHANNEL_DELETE'](payload)
+        return payload
+
+    def get_member(self, params: Dict, body: Dict) -> Dict:
+        payload = self.members.get((params['guild_id'], params['user_id']))
+        if payload is None:
+            self._not_found('Unknown Member')
+        return payload
+
+    def _member_update(self, guild_id: int, payload: Dict):
+        self.state.parsers['GUILD_MEMBER_UPDATE'](dict(payload, guild_id=str(guild_id)))
+
+    def edit_member(self, params: Dict, body: Dict) -> Dict:
+        guild_id, member_id = params['guild_id'], params['user_id']
+        payload = self.get_member(params, body)
+        if 'roles' in body:
+            payload['roles'] = [str(role_id) for role_id in body['roles']]
+            self._member_update(guild_id, payload)
+        if 'channel_id' in body:
+            channel_id = body['channel_id']
+            self.voice_state(guild_id, member_id, int(channel_id) if channel_id else None)
+        return payload
+
+    def add_role(self, params: Dict, body) -> None:
+        payload = self.get_member(params, body)
+        if str(params['role_id']) not in payload['roles']:
+            payload['roles'].append(str(params['role_id']))
+            self._member_update(params['guild_id'], payload)
+
+    def remove_role(self, params: Dict, body) -> None:
+        payload = self.get_member(params, body)
+        if str(params['role_id']) in payload['roles']:
+            payload['roles'].remove(str(params['role_id']))
+            self._member_update(params['guild_id'], payload)
+
+    def get_messages(self, params: Dict, body) -> List[Dict]:
+        return list(reversed(self.messages.get(params['channel_id'], [])[-1:]))
+
+    def get_message(self, params: Dict, body) -> Dict:
+        for payload in self.messages.get(params['channel_id'], []):
+            if int(payload['id']) == params['message_id']:
+                return payload
+        self._not_found('Unknown Message')
+
+    def send_message(self, params: Dict, body: Dict) -> Dict:
+        channel = self.channels[params['channel_id']]
+        return self.message(int(channel['guild_id']), params['channel_id'], self.state.self_id)
+
+    def delete_message(self, params: Dict, body) -> None:
+        messages = self.messages.get(params['channel_id'], [])
+        for payload in messages:
+            if int(payload['id']) == params['message_id']:
+                messages.remove(payload)
+                self.state.parsers['MESSAGE_DELETE']({
+                    'id': payload['id'], 'channel_id': payload['channel_id'], 'guild_id': payload['guild_id']
+                })
+                return
+        self._not_found('Unknown Message')
+
+
+class Replay:
+    """Feeds a recording to the handlers of main.py at a chosen speed and measures how they cope
+
+    The temporary channels of the recording are matched to the ones the replay creates for the
+    same owner; events about a recorded channel the replay did not create are skipped and counted.
+    """
+
+    def __init__(self, events: List[List], speed: float = 1.0, latency: float = API_LATENCY):
+        self.events = events
+        self.speed = speed
+        self.latency = latency
+        self.fed: Counter = Counter()  # kind -> events fed
+        self.skipped = 0
+        self.lag = 0.0  # largest delay between an event's due time and its feeding, in seconds
+        self.latencies: Dict[str, List[float]] = defaultdict(list)  # event -> handler durations
+        self.tasks = set()
+        self.fake: Optional[FakeDiscord] = None
+        self.temp_owners: Dict[int, int] = {}  # recorded temporary channel -> owner
+        self.bound: Dict[int, int] = {}  # recorded temporary channel -> replayed channel
+
+    def _prepare(self):
+        """Build the guilds and configurations the recording needs"""
+        snapshots: Dict[int, Dict] = {}
+        voice_channels: Dict[int, List[int]] = defaultdict(list)
+        text_channels: Dict[int, List[int]] = defaultdict(list)
+        for event in self.events:
+            kind, guild_id = event[1], event[2]
+            if kind == 'g':
+                snapshots.setdefault(guild_id, event[3])
+            elif kind == 'c':
+                self.temp_owners[event[3]] = event[4]
+        for event in self.events:
+            kind, guild_id = event[1], event[2]
+            if kind == 'v' and event[4] and event[4] not in self.temp_owners:
+                voice_channels[guild_id].append(event[4])
+            elif kind == 'm':
+                text_channels[guild_id].append(event[3])
+
+        for guild_id, snapshot in snapshots.items():
+            self.fake.add_guild(guild_id, snapshot, voice_channels[guild_id], text_channels[guild_id])
+            configs = main.get_guild_configs(guild_id)
+            for creator in snapshot.get('creators', []):
+                configs[creator['channel_id']] = main.VoiceCreatorConfig.from_dict(creator)
+            for rule in snapshot.get('autorole', []):
+                main.server_config.add_autorole_rule(guild_id, rule)
+            for channel_id in snapshot.get('sticky', []):
+                main.server_config.set_sticky_message(guild_id, channel_id, STICKY_CONTENT)
+            if snapshot.get('name_max_length'):
+                main.server_config.set_name_max_length(guild_id, snapshot['name_max_length'])
+
+    def _resolve(self, guild_id: int, channel_id: Optional[int]) -> Tuple[bool, Optional[int]]:
+        """Map a recorded channel to the replay's, False when it is a temporary channel the replay never created"""
+        if channel_id is None or channel_id not in self.temp_owners:
+            return True, channel_id
+        if channel_id not in self.bound:
+            owner_id = self.temp_owners[channel_id]
+            bound = set(self.bound.values())
+            candidates = [
+                replayed_id
+                for replayed_id, replayed_owner in main.channel_owners.get(guild_id, {}).items()
+                if replayed_owner == owner_id and replayed_id not in bound
+            ]
+            if not candidates:
+                return False, None
+            self.bound[channel_id] = max(candidates)
+        return True, self.bound[channel_id]
+
+    def _feed(self, event: List):
+        kind, guild_id = event[1], event[2]
+        if kind == 'v':
+            found, channel_id = self._resolve(guild_id, event[4])
+            if not found:
+                self.skipped += 1
+                return
+            self.fake.voice_state(guild_id, event[3], channel_id)
+        elif kind == 'j':
+            self.fake.member_join(guild_id, event[3], bool(event[4]))
+        elif kind == 'm':
+            self.fake.message(guild_id, event[3], event[4])
+        self.fed[kind] += 1
+
+    def _track(self, schedule_event: Callable) -> Callable:
+        def wrapper(coro, event_name, *args, **kwargs):
+            task = schedule_event(coro, event_name, *args, **kwargs)
+            started = time.perf_counter()
+            self.tasks.add(task)
+
+            def done(task):
+                self.tasks.discard(task)
+                self.latencies[event_name].append(time.perf_counter() - started)
+            task.add_done_callback(done)
+            return task
+        return wrapper
+
+    async def run(self) -> Dict:
+        bot = main.bot
+        state = bot._connection
+        state.user = nextcord.ClientUser(state=state, data={
+            'id': str(time_snowflake(utcnow())), 'username': 'replay', 'discriminator': '0', 'avatar': None, 'bot': True
+        })
+        self.fake = FakeDiscord(state, self.latency)
+        bot.http.request = self.fake.request
+        bot._schedule_event = self._track(bot._schedule_event)
+        self._prepare()
+
+        main.check_sticky_messages.start()
+        main.check_role_expiry.start()
+        started = time.perf_counter()
+        for event in self.events:
+            if event[1] not in ('v', 'j', 'm'):
+                continue
+            delay = event[0] / 1000 / self.speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.lag = max(self.lag, -delay)
+            self._feed(event)
+        duration = time.perf_counter() - started
+
+        await asyncio.sleep(main.edit_coalescer.delay)
+        if self.tasks:
+            await asyncio.wait(list(self.tasks), timeout=SETTLE_SECONDS)
+        main.check_sticky_messages.cancel()
+        main.check_role_expiry.cancel()
+        return self._report(duration)
+
+    def _report(self, duration: float) -> Dict:
+        latency = {}
+        for name, samples in self.latencies.items():
+            ordered = sorted(samples)
+            latency[name] = {
+                'count': len(ordered),
+                'p50_ms': ordered[len(ordered) // 2] * 1000,
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+                'max_ms': ordered[-1] * 1000
+            }
+
+        guilds = {}
+        for guild in main.bot.guilds:
+            guilds[str(guild.id)] = {
+                'temp_channels': len(main.created_channels.get(guild.id, ())),
+                'members_in_voice': sum(1 for (guild_id, _), channel_id in self.fake.voice.items() if guild_id == guild.id and channel_id),
+                'overflow_categories': sum(len(config.overflow_categories) for config in main.get_guild_configs(guild.id).values()),
+                'joined_members': len(main.server_config.joined_members.get(guild.id, {})),
+                'voice_stats': main.voice_analytics.get_summary(guild.id)
+            }
+        return {
+            'speed': self.speed,
+            'duration_s': duration,
+            'lag_ms': self.lag * 1000,
+            'events': dict(self.fed),
+            'skipped_events': self.skipped,
+            'api_calls': sum(self.fake.calls.values()),
+            'api_routes': dict(self.fake.calls.most_common()),
+            'unhandled_routes': dict(self.fake.unhandled),
+            'pending_edits': len(main.edit_coalescer.pending),
+            'latency': latency,
+            'guilds': guilds
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a RECORD_EVENTS recording against a stand-in for Discord's API")
+    parser.add_argument('recording', help="recording file written in recordings/")
+    parser.add_argument('--speed', type=float, default=1.0, help="replay speed, 10 replays ten times faster than recorded")
+    parser.add_argument('--api-latency', type=float, default=API_LATENCY * 1000, help="milliseconds per API call")
+    parser.add_argument('--output', help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    events = read_recording(args.recording)
+    output = os.path.abspath(args.output) if args.output else None
+    # The replayed bot saves its state in a scratch directory, never next to the real configuration
+    with tempfile.TemporaryDirectory(prefix='replay-') as directory:
+        os.chdir(directory)
+        report = asyncio.run(Replay(events, args.speed, args.api_latency / 1000).run())
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
@@ -0,0 +1,178 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Set
+
+SHARD_CAPACITY = 1000  # guilds kept loaded, guilds with scheduled work not included
+SHARD_IDLE_SECONDS = 30 * 60  # unused guilds are written back and unloaded after this delay
+INDEX_FILE = 'index.json'
+
+
+class ShardStore:
+    """Per-guild JSON files loaded on first use and kept in a bounded LRU
+
+    The owner keeps the parsed state of the loaded guilds: the store calls
+    load(guild_id, data) when a shard is read, dump(guild_id) when it is written
+    back and drop(guild_id) when it is unloaded. Changes are only written by
+    flush() or on eviction. Pinned guilds have scheduled work, they are never
+    evicted and are listed in the index file to be preloaded at startup.
+    """
+
+    def __init__(self, directory: str, load: Callable[[int, Dict], None], dump: Callable[[int], Dict],
+                 drop: Callable[[int], None], capacity: int = SHARD_CAPACITY, idle_seconds: float = SHARD_IDLE_SECONDS):
+        self.directory = directory
+        self.load = load
+        self.dump = dump
+        self.drop = drop
+        self.capacity = capacity
+        self.idle_seconds = idle_seconds
+        self.loaded: 'OrderedDict[int, float]' = OrderedDict()  # guild_id -> last use, least recent first
+        self.dirty: Set[int] = set()
+        self.pinned: Set[int] = set()
+        self._index_dirty = False
+
+    def _path(self, guild_id: int) -> str:
+        return os.path.join(self.directory, f'{guild_id}.json')
+
+    def touch(self, guild_id: int):
+        """Load the shard of a guild if needed and mark it as recently used"""
+        if guild_id in self.loaded:
+            self.loaded.move_to_end(guild_id)
+            self.loaded[guild_id] = time.monotonic()
+            return
+
+        # Registered before loading so the load callback can use the guild's state
+        self.loaded[guild_id] = time.monotonic()
+        self.load(guild_id, self._read(guild_id))
+        if len(self.loaded) - len(self.pinned) > self.capacity:
+            self._evict_lru()
+
+    def _read(self, guild_id: int) -> Dict:
+        path = self._path(guild_id)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+            return {}
+
+    def mark_dirty(self, guild_id: int):
+        """Schedule the write-back of a loaded guild
+
+        Raises:
+            RuntimeError: The guild is not loaded, its state was evicted and dump() would return nothing
+        """
+        if guild_id not in self.loaded:
+            raise RuntimeError(f"Guild {guild_id} is not loaded in {self.directory}, touch it before changing it")
+        self.dirty.add(guild_id)
+
+    def pin(self, guild_id: int, pinned: bool):
+        """Keep a guild loaded (and preloaded at startup) while it has scheduled work"""
+        if pinned == (guild_id in self.pinned):
+            return
+        if pinned:
+            self.pinned.add(guild_id)
+        else:
+            self.pinned.discard(guild_id)
+        self._index_dirty = True
+
+    def preload(self):
+        """Load the guilds listed in the index"""
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), 'r', encoding='utf-8') as f:
+                guild_ids = json.load(f).get('pinned', [])
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error loading the shard index of {self.directory}: {e}")
+            return
+
+        for guild_id in guild_ids:
+            self.touch(int(guild_id))
+        print(f"Preloaded {len(guild_ids)} guilds with scheduled work from {self.directory}")
+
+    def flush(self) -> int:
+        """Write back every modified shard and the index. Returns the number of shards written."""
+        written = 0
+        for guild_id in list(self.dirty):
+            # An unloaded guild was written back on eviction, dumping it now would erase its file
+            if guild_id in self.loaded:
+                self._write(guild_id, self.dump(guild_id))
+                written += 1
+        self.dirty.clear()
+
+        if self._index_dirty:
+            self._write_file(INDEX_FILE, {'pinned': sorted(self.pinned)})
+            self._index_dirty = False
+        return written
+
+    def _write(self, guild_id: int, data: Dict):
+        if data:
+            self._write_file(f'{guild_id}.json', data)
+        elif os.path.exists(self._path(guild_id)):
+            os.remove(self._path(guild_id))
+
+    def _write_file(self, name: str, data: Dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+    def _unload(self, guild_id: int):
+        if guild_id in self.dirty:
+            self._write(guild_id, self.dump(guild_id))
+            self.dirty.discard(guild_id)
+        del self.loaded[guild_id]
+        self.drop(guild_id)
+
+    def _evict_lru(self):
+        for guild_id in self.loaded:
+            if guild_id not in self.pinned:
+                self._unload(guild_id)
+                return
+
+    def evict(self) -> List[int]:
+        """Write back and unload the idle guilds, then the least recently used ones past the capacity"""
+        now = time.monotonic()
+        unpinned = [guild_id for guild_id in self.loaded if guild_id not in self.pinned]
+        overflow = len(unpinned) - self.capacity
+        evicted = []
+        # Least recently used first: stop at the first guild that is neither idle nor over capacity
+        for i, guild_id in enumerate(unpinned):
+            if i >= overflow and now - self.loaded[guild_id] < self.idle_seconds:
+                break
+            self._unload(guild_id)
+            evicted.append(guild_id)
+        return evicted
+
+    def delete(self, guild_id: int):
+        """Unload a guild without writing it back and remove its file"""
+        self.dirty.discard(guild_id)
+        self.pin(guild_id, False)
+        if self.loaded.pop(guild_id, None) is not None:
+            self.drop(guild_id)
+        self._write(guild_id, {})
+
+    def import_legacy(self, shards: Dict[int, Dict], pinned: Iterable[int] = ()):
+        """Write the shards split from a legacy single file, along with the index"""
+        for guild_id, data in shards.items():
+            self._write(guild_id, data)
+        for guild_id in pinned:
+            self.pin(guild_id, True)
+        self._write_file(INDEX_FILE, {'pinned': sorted(self.pinned)})
+        self._index_dirty = False
+
+    def shard_bytes(self, guild_id: int) -> int:
+        """Size of a guild's shard file on disk"""
+        path = self._path(guild_id)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def total_bytes(self) -> int:
+        """Size of all the shard files on disk"""
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
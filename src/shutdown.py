@@ -0,0 +1,66 @@
+import asyncio
+import signal
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+SHUTDOWN_DEADLINE = 20.0  # seconds to finish in-flight work, Heroku kills the dyno 30 seconds after SIGTERM
+
+
+class GracefulShutdown:
+    """Tracks the voice and role actions in flight so a shutdown can stop intake and wait for them"""
+
+    def __init__(self, deadline: float = SHUTDOWN_DEADLINE):
+        self.deadline = deadline
+        self.accepting = True
+        self.in_flight: Dict[str, int] = {}  # kind -> actions in progress
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._ends_at = 0.0
+        self._installed = False
+
+    def install(self, callback: Callable[[str], None]):
+        """Replace the default SIGTERM/SIGINT handlers, which stop the loop right away"""
+        if self._installed:
+            return
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, callback, sig.name)
+            except NotImplementedError:
+                return  # Windows: keep the default handlers
+        self._installed = True
+
+    def begin(self) -> bool:
+        """Stop accepting new work. Returns False if a shutdown is already in progress."""
+        if not self.accepting:
+            return False
+        self.accepting = False
+        self._ends_at = time.monotonic() + self.deadline
+        return True
+
+    def remaining(self) -> float:
+        """Seconds left before the shutdown deadline"""
+        return max(0.0, self._ends_at - time.monotonic())
+
+    @contextmanager
+    def track(self, kind: str):
+        """Mark an action as in flight until the block exits"""
+        self.in_flight[kind] = self.in_flight.get(kind, 0) + 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.in_flight[kind] -= 1
+            if not self.in_flight[kind]:
+                del self.in_flight[kind]
+            if not self.in_flight:
+                self._idle.set()
+
+    async def drain(self) -> Dict[str, int]:
+        """Wait for the actions in flight, at most until the deadline. Returns the ones left."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.remaining())
+        except asyncio.TimeoutError:
+            pass
+        return dict(self.in_flight)
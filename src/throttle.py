@@ -0,0 +1,60 @@
+import time
+from typing import Dict, Hashable, List
+
+# Temp channel creations allowed per member: a burst of 3, then one every 20 seconds
+USER_CREATE_CAPACITY = 3
+USER_CREATE_REFILL = 1 / 20  # tokens per second
+
+# Temp channel creations allowed per guild: a burst of 10, then one every 2 seconds
+GUILD_CREATE_CAPACITY = 10
+GUILD_CREATE_REFILL = 1 / 2
+
+MAX_BUCKETS = 10000  # full buckets are dropped past this size
+
+
+class RateLimiter:
+    """Token buckets keyed by an arbitrary id"""
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.buckets: Dict[Hashable, List[float]] = {}  # key -> [tokens, last refill time]
+
+    def _tokens(self, key: Hashable, now: float) -> float:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return self.capacity
+        return min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_rate)
+
+    def can_acquire(self, key: Hashable) -> bool:
+        """Check whether a token is available without consuming it"""
+        return self._tokens(key, time.monotonic()) >= 1
+
+    def acquire(self, key: Hashable):
+        """Consume a token"""
+        now = time.monotonic()
+        self.buckets[key] = [self._tokens(key, now) - 1, now]
+        if len(self.buckets) > MAX_BUCKETS:
+            self._prune(now)
+
+    def _prune(self, now: float):
+        # A full bucket behaves exactly like a missing one
+        for key in [key for key in self.buckets if self._tokens(key, now) >= self.capacity]:
+            del self.buckets[key]
+
+
+class CreationThrottle:
+    """Limits temp channel creations per member and per guild"""
+
+    def __init__(self):
+        self.users = RateLimiter(USER_CREATE_CAPACITY, USER_CREATE_REFILL)
+        self.guilds = RateLimiter(GUILD_CREATE_CAPACITY, GUILD_CREATE_REFILL)
+
+    def try_acquire(self, guild_id: int, member_id: int) -> bool:
+        """Consume a creation from both buckets, or none if either is empty"""
+        user_key = (guild_id, member_id)
+        if not (self.users.can_acquire(user_key) and self.guilds.can_acquire(guild_id)):
+            return False
+        self.users.acquire(user_key)
+        self.guilds.acquire(guild_id)
+        return True
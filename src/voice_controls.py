@@ -0,0 +1,128 @@
+import asyncio
+from typing import Dict, Optional, Tuple, Union
+
+import nextcord
+
+EDIT_DELAY = 1.5  # seconds during which successive changes are merged into one edit
+
+PermissionTarget = Union[nextcord.Role, nextcord.Member]
+
+
+def get_overwrites(channel: nextcord.abc.GuildChannel) -> Dict[Union[PermissionTarget, nextcord.Object], nextcord.PermissionOverwrite]:
+    """Get every overwrite of a channel
+
+    channel.overwrites silently drops the members that are not in the cache, and members are
+    not chunked at startup. Those members are kept here as nextcord.Object, which nextcord
+    sends back as member overwrites.
+    """
+    overwrites = {}
+    for overwrite in channel._overwrites:
+        if overwrite.is_role():
+            target = channel.guild.get_role(overwrite.id)
+            if target is None:
+                continue  # Deleted role
+        else:
+            target = channel.guild.get_member(overwrite.id) or nextcord.Object(overwrite.id)
+        overwrites[target] = nextcord.PermissionOverwrite.from_pair(
+            nextcord.Permissions(overwrite.allow), nextcord.Permissions(overwrite.deny)
+        )
+    return overwrites
+
+
+def get_member_overwrite(channel: nextcord.abc.GuildChannel, member_id: int) -> nextcord.PermissionOverwrite:
+    """Get the overwrite of a member on a channel, even when the member is not in the cache"""
+    for overwrite in channel._overwrites:
+        if overwrite.is_member() and overwrite.id == member_id:
+            return nextcord.PermissionOverwrite.from_pair(nextcord.Permissions(overwrite.allow), nextcord.Permissions(overwrite.deny))
+    return nextcord.PermissionOverwrite()
+
+
+class EditCoalescer:
+    """Merges successive changes to a channel into a single channel.edit call"""
+
+    def __init__(self, delay: float = EDIT_DELAY):
+        self.delay = delay
+        # channel_id -> {'channel', 'options', 'overwrites': target_id -> (target, overwrite or None to remove it),
+        #                'task': the delayed flush, referenced so it is not garbage collected}
+        self.pending: Dict[int, Dict] = {}
+
+    def _get_entry(self, channel: nextcord.abc.GuildChannel) -> Dict:
+        entry = self.pending.get(channel.id)
+        if entry is None:
+            entry = self.pending[channel.id] = {'channel': channel, 'options': {}, 'overwrites': {}}
+            entry['task'] = asyncio.get_running_loop().create_task(self._flush_later(channel.id))
+        entry['channel'] = channel
+        return entry
+
+    def queue_options(self, channel: nextcord.abc.GuildChannel, **options):
+        """Queue plain channel options such as user_limit or name"""
+        self._get_entry(channel)['options'].update(options)
+
+    def queue_permissions(self, channel: nextcord.abc.GuildChannel, target: PermissionTarget, **permissions):
+        """Queue a permission change for a role or member, on top of the changes already pending"""
+        entry = self._get_entry(channel)
+        pending = entry['overwrites'].get(target.id)
+        if pending:
+            overwrite = pending[1] or nextcord.PermissionOverwrite()
+        else:
+            overwrite = channel.overwrites_for(target)
+        overwrite = nextcord.PermissionOverwrite.from_pair(*overwrite.pair())
+        overwrite.update(**permissions)
+        entry['overwrites'][target.id] = (target, overwrite)
+
+    def queue_overwrite(self, channel: nextcord.abc.GuildChannel, target: Union[PermissionTarget, nextcord.Object],
+                        overwrite: Optional[nextcord.PermissionOverwrite]):
+        """Queue the replacement of the whole overwrite of a role or member, None removes it"""
+        if overwrite is not None and overwrite.is_empty():
+            overwrite = None
+        self._get_entry(channel)['overwrites'][target.id] = (target, overwrite)
+
+    def get_pending_options(self, channel_id: int) -> Dict:
+        """Get the plain options queued for a channel and not applied yet"""
+        entry = self.pending.get(channel_id)
+        return dict(entry['options']) if entry else {}
+
+    @staticmethod
+    def _cancel_later(entry: Dict):
+        """Cancel the delayed flush of an entry, unless it is the one running"""
+        task = entry['task']
+        if task is not asyncio.current_task():
+            task.cancel()
+
+    async def _flush_later(self, channel_id: int):
+        await asyncio.sleep(self.delay)
+        await self.flush(channel_id)
+
+    async def flush(self, channel_id: int):
+        """Apply every pending change of a channel in one API call"""
+        entry = self.pending.pop(channel_id, None)
+        if not entry:
+            return
+        self._cancel_later(entry)
+
+        channel = entry['channel']
+        options = dict(entry['options'])
+        if entry['overwrites']:
+            # Merged by id, a removal (None) drops the target from the channel
+            overwrites: Dict[int, Tuple[PermissionTarget, Optional[nextcord.PermissionOverwrite]]] = {
+                target.id: (target, overwrite) for target, overwrite in get_overwrites(channel).items()
+            }
+            overwrites.update(entry['overwrites'])
+            options['overwrites'] = {target: overwrite for target, overwrite in overwrites.values() if overwrite is not None}
+
+        try:
+            await channel.edit(**options)
+        except nextcord.NotFound:
+            pass  # The channel was deleted in the meantime
+        except nextcord.HTTPException as e:
+            print(f"Error editing channel {channel_id}: {e}")
+
+    async def flush_all(self):
+        """Apply the pending changes of every channel now"""
+        await asyncio.gather(*(self.flush(channel_id) for channel_id in list(self.pending)))
+
+    def discard(self, channel_id: int):
+        """Drop the pending changes of a channel that no longer exists"""
+        entry = self.pending.pop(channel_id, None)
+        if entry:
+            self._cancel_later(entry)
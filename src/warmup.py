@@ -0,0 +1,89 @@
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Hashable, List, Set, Tuple
+
+WARMUP_WINDOW = 60.0  # seconds over which catch-up jobs are spread after a restart
+PROGRESS_STEPS = 4  # progress is reported every quarter
+
+
+class WarmupScheduler:
+    """Spreads the catch-up work due after a restart over a window, with jitter
+
+    Jobs are identified by keys so the periodic tasks can skip the work the
+    warm-up still owns. Voice channel creations keep priority: a job only starts
+    once no creation is in flight.
+    """
+
+    def __init__(self, window: float = WARMUP_WINDOW):
+        self.window = window
+        self.jobs: List[Tuple[Hashable, Callable[[], Awaitable]]] = []
+        self.pending: Set[Hashable] = set()
+        self.done = 0
+        self.total = 0
+        self.running = False
+        self.stopped = False
+        self._voice_in_flight = 0
+        self._voice_idle = asyncio.Event()
+        self._voice_idle.set()
+
+    def add(self, key: Hashable, job: Callable[[], Awaitable]):
+        """Queue a catch-up job, the periodic tasks should skip its key until it has run"""
+        self.jobs.append((key, job))
+        self.pending.add(key)
+
+    def is_pending(self, key: Hashable) -> bool:
+        return key in self.pending
+
+    def stop(self):
+        """Skip the jobs that have not started yet"""
+        self.stopped = True
+
+    @contextmanager
+    def voice_priority(self):
+        """Hold back warm-up jobs while a voice channel is being created"""
+        self._voice_in_flight += 1
+        self._voice_idle.clear()
+        try:
+            yield
+        finally:
+            self._voice_in_flight -= 1
+            if not self._voice_in_flight:
+                self._voice_idle.set()
+
+    async def run(self):
+        """Run the queued jobs spread evenly over the window"""
+        if self.running or not self.jobs:
+            return
+        self.running = True
+        jobs, self.jobs = self.jobs, []
+        self.done, self.total = 0, len(jobs)
+        slot = self.window / self.total
+        started = time.monotonic()
+        print(f"Warm-up: {self.total} catch-up jobs over {self.window:.0f} seconds")
+
+        try:
+            for i, (key, job) in enumerate(jobs):
+                # Each job gets its own slot in the window, jittered inside that slot
+                delay = i * slot + random.uniform(0, slot)
+                await asyncio.sleep(max(0.0, started + delay - time.monotonic()))
+                # Time spent yielding to voice creations pushes the rest of the schedule back
+                waited = time.monotonic()
+                await self._voice_idle.wait()
+                started += time.monotonic() - waited
+                if self.stopped:
+                    break
+                try:
+                    await job()
+                except Exception as e:
+                    print(f"Warm-up job {key} failed: {e}")
+                finally:
+                    self.pending.discard(key)
+                    self.done += 1
+
+                if self.done * PROGRESS_STEPS // self.total != (self.done - 1) * PROGRESS_STEPS // self.total:
+                    print(f"Warm-up: {self.done}/{self.total} jobs done")
+        finally:
+            self.pending.clear()
+            self.running = False
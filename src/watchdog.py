@@ -0,0 +1,131 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+SAMPLE_INTERVAL = 0.5  # seconds between two lag measurements
+BLOCK_THRESHOLD = 0.25  # seconds the loop may stall before its stack is captured
+LAG_BUFFER_SIZE = 240  # two minutes of lag samples
+MAX_OFFENDERS = 50
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float = SAMPLE_INTERVAL, block_threshold: float = BLOCK_THRESHOLD):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.lag_samples: Deque[float] = deque(maxlen=LAG_BUFFER_SIZE)
+        self.offenders: Dict[str, Dict] = {}  # code location -> {'count', 'worst', 'task', 'stack'}
+        self.task_drift: Dict[str, Dict] = {}  # task name -> {'nominal', 'last', 'count', 'total', 'worst'}
+        self._heartbeat = time.monotonic()
+        self._stall_key: Optional[str] = None
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start measuring lag on the running event loop (call from a coroutine)"""
+        if self._monitor_task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._monitor_task = self._loop.create_task(self._monitor())
+        threading.Thread(target=self._detect_blocking, name='loop-watchdog', daemon=True).start()
+
+    async def _monitor(self):
+        """Measure how late the loop wakes us up compared to the requested sleep"""
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                self.lag_samples.append(max(0.0, now - started - self.interval))
+                self._heartbeat = now
+                self._stall_key = None
+
+    def _detect_blocking(self):
+        """Runs in a separate thread and captures the loop thread's stack while it is stalled"""
+        while True:
+            time.sleep(self.block_threshold / 2)
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled < self.block_threshold:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            task = asyncio.current_task(self._loop)
+            self._record_stall(stack, task.get_name() if task else None, stalled)
+
+    def _record_stall(self, stack: traceback.StackSummary, task_name: Optional[str], stalled: float):
+        # Attribute the stall to the innermost frame of our own code, falling back to the innermost frame
+        own_frames = [frame for frame in stack if frame.filename.startswith(SOURCE_DIR)]
+        culprit = own_frames[-1] if own_frames else stack[-1]
+        key = f"{os.path.basename(culprit.filename)}:{culprit.lineno} in {culprit.name}"
+
+        with self._lock:
+            offender = self.offenders.get(key)
+            if offender is None:
+                if len(self.offenders) >= MAX_OFFENDERS:
+                    # Make room by dropping the mildest offender
+                    mildest = min(self.offenders, key=lambda k: self.offenders[k]['worst'])
+                    del self.offenders[mildest]
+                offender = self.offenders[key] = {'count': 0, 'worst': 0.0, 'task': None, 'stack': ''}
+
+            # The same stall is sampled several times, only count it once
+            if self._stall_key != key:
+                offender['count'] += 1
+                self._stall_key = key
+                print(f"Event loop blocked for {stalled * 1000:.0f}ms at {key}")
+
+            if stalled > offender['worst']:
+                offender['worst'] = stalled
+                offender['task'] = task_name
+                offender['stack'] = ''.join(traceback.format_list(stack[-8:]))
+
+    def record_tick(self, name: str, nominal: float):
+        """Record an iteration of a periodic task to measure its drift from the nominal schedule"""
+        now = time.monotonic()
+        with self._lock:
+            drift = self.task_drift.get(name)
+            if drift is None:
+                self.task_drift[name] = {'nominal': nominal, 'last': now, 'count': 0, 'total': 0.0, 'worst': 0.0}
+                return
+
+            late = max(0.0, now - drift['last'] - nominal)
+            drift['last'] = now
+            drift['count'] += 1
+            drift['total'] += late
+            drift['worst'] = max(drift['worst'], late)
+
+    def get_lag_stats(self) -> Dict[str, float]:
+        """Get current, average and maximum loop lag over the sample window, in seconds"""
+        with self._lock:
+            samples = list(self.lag_samples)
+        if not samples:
+            return {'current': 0.0, 'average': 0.0, 'max': 0.0}
+        return {
+            'current': samples[-1],
+            'average': sum(samples) / len(samples),
+            'max': max(samples)
+        }
+
+    def get_worst_offenders(self, limit: int = 5) -> List[Dict]:
+        """Get the code locations that blocked the loop the longest"""
+        with self._lock:
+            offenders = [dict(offender, location=key) for key, offender in self.offenders.items()]
+        offenders.sort(key=lambda offender: offender['worst'], reverse=True)
+        return offenders[:limit]
+
+    def get_task_drift(self) -> Dict[str, Dict]:
+        """Get the drift statistics of the periodic tasks"""
+        with self._lock:
+            return {name: dict(drift) for name, drift in self.task_drift.items()}